@@ -0,0 +1,30 @@
+"""add question_reviews timestamp defaults
+
+Revision ID: 0c5e8a3f7d21
+Revises: f2a7c9d1e834
+Create Date: 2026-10-15 14:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5e8a3f7d21'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c9d1e834'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in ('created_at', 'updated_at'):
+        op.alter_column('question_reviews', column, server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('created_at', 'updated_at'):
+        op.alter_column('question_reviews', column, server_default=None)
@@ -0,0 +1,40 @@
+"""add listing and lookup indexes
+
+Revision ID: 3f9c1e7b2a4d
+Revises: add_file_path_col
+Create Date: 2026-10-15 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1e7b2a4d'
+down_revision: Union[str, Sequence[str], None] = 'add_file_path_col'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # Library listing: ORDER BY created_at DESC (id breaks ties for keyset paging)
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_created_at_id "
+            "ON documents (created_at DESC, id DESC)"
+        )
+        # Document details: questions WHERE document_id = ? ORDER BY created_at
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questions_document_id_created_at "
+            "ON questions (document_id, created_at)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_questions_document_id_created_at")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_created_at_id")
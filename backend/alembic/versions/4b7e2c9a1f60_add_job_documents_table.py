@@ -0,0 +1,41 @@
+"""add job_documents table
+
+Revision ID: 4b7e2c9a1f60
+Revises: 9e4b1d7a5c38
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c9a1f60'
+down_revision: Union[str, Sequence[str], None] = '9e4b1d7a5c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped with create_all already have the table
+    if sa.inspect(op.get_bind()).has_table('job_documents'):
+        return
+
+    op.create_table('job_documents',
+    sa.Column('job_id', sa.Uuid(), nullable=False),
+    sa.Column('document_id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id', 'document_id')
+    )
+    op.create_index('ix_job_documents_document_id', 'job_documents', ['document_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_documents_document_id', table_name='job_documents')
+    op.drop_table('job_documents')
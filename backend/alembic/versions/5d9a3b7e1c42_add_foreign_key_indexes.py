@@ -0,0 +1,44 @@
+"""add foreign key indexes
+
+Revision ID: 5d9a3b7e1c42
+Revises: c4e7a2f91b05
+Create Date: 2026-10-15 11:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9a3b7e1c42'
+down_revision: Union[str, Sequence[str], None] = 'c4e7a2f91b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # question_reviews is only created by create_all, so it may be missing
+    has_reviews = sa.inspect(op.get_bind()).has_table("question_reviews")
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # Job -> documents loads and cascade deletes
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_job_id "
+            "ON documents (job_id)"
+        )
+        if has_reviews:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_question_reviews_question_id "
+                "ON question_reviews (question_id)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_question_reviews_question_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_job_id")
@@ -0,0 +1,33 @@
+"""add document exam_type index
+
+Revision ID: 7a3c5e9f2b16
+Revises: e1f6b8d23a70
+Create Date: 2026-10-15 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c5e9f2b16'
+down_revision: Union[str, Sequence[str], None] = 'e1f6b8d23a70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_exam_type "
+            "ON documents (exam_type) WHERE exam_type IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_exam_type")
@@ -0,0 +1,48 @@
+"""add trigram search indexes
+
+Revision ID: 8b21d4c6e0f3
+Revises: 3f9c1e7b2a4d
+Create Date: 2026-10-15 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b21d4c6e0f3'
+down_revision: Union[str, Sequence[str], None] = '3f9c1e7b2a4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column) for every column filtered with ILIKE '%term%'
+TRIGRAM_INDEXES = [
+    ("ix_questions_content_trgm", "questions", "content"),
+    ("ix_questions_subject_trgm", "questions", "subject"),
+    ("ix_documents_filename_trgm", "documents", "filename"),
+    ("ix_documents_course_name_trgm", "documents", "course_name"),
+    ("ix_documents_course_code_trgm", "documents", "course_code"),
+    ("ix_documents_exam_date_trgm", "documents", "exam_date"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, column in TRIGRAM_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in TRIGRAM_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
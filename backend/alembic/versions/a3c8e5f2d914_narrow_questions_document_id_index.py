@@ -0,0 +1,40 @@
+"""narrow questions document_id index
+
+Revision ID: a3c8e5f2d914
+Revises: d6f1a8c3b527
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e5f2d914'
+down_revision: Union[str, Sequence[str], None] = 'd6f1a8c3b527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # Document details sort by question_number now; created_at served
+        # no query. Build the replacement before dropping the old index.
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questions_document_id "
+            "ON questions (document_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_questions_document_id_created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questions_document_id_created_at "
+            "ON questions (document_id, created_at)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_questions_document_id")
@@ -0,0 +1,43 @@
+"""add question_reviews table
+
+Revision ID: b8d2f4a6c913
+Revises: 7a3c5e9f2b16
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f4a6c913'
+down_revision: Union[str, Sequence[str], None] = '7a3c5e9f2b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped with create_all already have the table
+    if sa.inspect(op.get_bind()).has_table('question_reviews'):
+        return
+
+    op.create_table('question_reviews',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('question_id', sa.Uuid(), nullable=False),
+    sa.Column('marked_for_review', sa.Boolean(), nullable=False),
+    sa.Column('notes', sa.String(length=1000), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_question_reviews_question_id', 'question_reviews', ['question_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_question_reviews_question_id', table_name='question_reviews')
+    op.drop_table('question_reviews')
@@ -0,0 +1,45 @@
+"""use question uuid as qdrant point id
+
+Revision ID: d6f1a8c3b527
+Revises: 4b7e2c9a1f60
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f1a8c3b527'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c9a1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Old integer point ids restarted at 0 in every job, so later jobs
+    # overwrote earlier points; none of them can be trusted. Clearing them
+    # makes re-uploads of those PDFs index again under their question ids.
+    op.alter_column(
+        'questions',
+        'qdrant_id',
+        type_=sa.Uuid(),
+        existing_type=sa.Integer(),
+        existing_nullable=True,
+        postgresql_using='NULL',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'questions',
+        'qdrant_id',
+        type_=sa.Integer(),
+        existing_type=sa.Uuid(),
+        existing_nullable=True,
+        postgresql_using='NULL',
+    )
@@ -0,0 +1,71 @@
+"""use native uuid keys
+
+Revision ID: e1f6b8d23a70
+Revises: 5d9a3b7e1c42
+Create Date: 2026-10-15 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f6b8d23a70'
+down_revision: Union[str, Sequence[str], None] = '5d9a3b7e1c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (constraint name, table, column, referenced table)
+FOREIGN_KEYS = [
+    ("documents_job_id_fkey", "documents", "job_id", "jobs"),
+    ("questions_document_id_fkey", "questions", "document_id", "documents"),
+    ("question_reviews_question_id_fkey", "question_reviews", "question_id", "questions"),
+]
+
+# (table, column) for every key column stored as String(36)
+KEY_COLUMNS = [
+    ("jobs", "id"),
+    ("documents", "id"),
+    ("documents", "job_id"),
+    ("questions", "id"),
+    ("questions", "document_id"),
+    ("question_reviews", "id"),
+    ("question_reviews", "question_id"),
+]
+
+
+def _convert(to_type: sa.types.TypeEngine, using: str) -> None:
+    # question_reviews is only created by create_all, so it may be missing
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    # Referencing and referenced columns must change type together
+    for name, table, _, referenced in FOREIGN_KEYS:
+        if table in tables:
+            op.drop_constraint(name, table, type_='foreignkey')
+
+    for table, column in KEY_COLUMNS:
+        if table in tables:
+            op.alter_column(
+                table,
+                column,
+                type_=to_type,
+                existing_nullable=False,
+                postgresql_using=using.format(column=column),
+            )
+
+    for name, table, column, referenced in FOREIGN_KEYS:
+        if table in tables:
+            op.create_foreign_key(name, table, referenced, [column], ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _convert(sa.Uuid(), '{column}::uuid')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert(sa.String(length=36), '{column}::text')
@@ -0,0 +1,40 @@
+"""add question_reviews composite index
+
+Revision ID: f2a7c9d1e834
+Revises: b8d2f4a6c913
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9d1e834'
+down_revision: Union[str, Sequence[str], None] = 'b8d2f4a6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_question_reviews_question_id_marked "
+            "ON question_reviews (question_id, marked_for_review)"
+        )
+        # Covered by the leading column of the composite index
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_question_reviews_question_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_question_reviews_question_id "
+            "ON question_reviews (question_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_question_reviews_question_id_marked")
@@ -1,103 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, cast, literal_column, Boolean, Integer, JSON
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from typing import List
-import os
+import aiofiles.os
+import uuid
 
 from app.core.database import get_db
 from app.models import Document, Question
 from app.schemas.question import QuestionResponse
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter(tags=["documents"])
 
 
 @router.get("/documents/{document_id}")
-async def get_document_details(document_id: str, db: AsyncSession = Depends(get_db)):
+async def get_document_details(document_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """Get document details with all associated questions."""
-    # Fetch document with questions
+    # Build the question list in Postgres so one round trip returns the payload
+    question_json = func.json_build_object(
+        "id", Question.id,
+        "content", Question.content,
+        "document_id", Question.document_id,
+        "part", Question.part,
+        "part_marks", Question.part_marks,
+        "question_number", Question.question_number,
+        "unit", Question.unit,
+        "is_mcq", cast(func.coalesce(Question.is_mcq, 0), Boolean),
+        "options", Question.options,
+        "correct_answer", Question.correct_answer,
+        "subject", Question.subject,
+        "topic", Question.topic,
+        "difficulty", Question.difficulty,
+        "question_type", Question.question_type,
+        "year", Question.year,
+        "marks", Question.marks,
+        "is_mandatory", cast(func.coalesce(Question.is_mandatory, 1), Boolean),
+        "has_or_option", cast(func.coalesce(Question.has_or_option, 0), Boolean),
+        "created_at", Question.created_at,
+    )
+    questions_agg = func.coalesce(
+        func.json_agg(
+            aggregate_order_by(
+                question_json,
+                # question_number is text ("2", "10", "21.a"): numeric part first
+                cast(func.substring(Question.question_number, r"^\d+"), Integer),
+                Question.question_number,
+            )
+        ).filter(Question.id.isnot(None)),
+        literal_column("'[]'::json"),
+        type_=JSON,
+    )
+
     stmt = (
-        select(Document)
-        .where(Document.id == document_id)
-        .options(selectinload(Document.questions))
+        select(
+            Document.id,
+            Document.filename,
+            Document.file_hash,
+            Document.page_count,
+            Document.course_code,
+            Document.course_name,
+            Document.semester,
+            Document.exam_date,
+            Document.total_marks,
+            Document.duration_minutes,
+            Document.exam_type,
+            Document.created_at,
+            questions_agg.label("questions"),
+        )
+        .outerjoin(Question, Question.document_id == Document.id)
+        .where(Document.id == str(document_id))
+        .group_by(Document.id)
     )
     result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
+    document = result.mappings().one_or_none()
 
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Format response
-    return {
-        "id": str(document.id),
-        "filename": document.filename,
-        "file_hash": document.file_hash,
-        "page_count": document.page_count,
-        "course_code": document.course_code,
-        "course_name": document.course_name,
-        "semester": document.semester,
-        "exam_date": document.exam_date,
-        "total_marks": document.total_marks,
-        "duration_minutes": document.duration_minutes,
-        "exam_type": document.exam_type,
-        "created_at": document.created_at.isoformat() if document.created_at else None,
-        "questions": [
-            {
-                "id": str(q.id),
-                "content": q.content,
-                "document_id": str(q.document_id),
-                "part": q.part,
-                "part_marks": q.part_marks,
-                "question_number": q.question_number,
-                "unit": q.unit,
-                "is_mcq": bool(q.is_mcq),
-                "options": q.options,
-                "correct_answer": q.correct_answer,
-                "subject": q.subject,
-                "topic": q.topic,
-                "difficulty": q.difficulty,
-                "question_type": q.question_type,
-                "year": q.year,
-                "marks": q.marks,
-                "is_mandatory": bool(q.is_mandatory),
-                "has_or_option": bool(q.has_or_option),
-                "created_at": q.created_at.isoformat() if q.created_at else None,
-            }
-            for q in document.questions
-        ],
-    }
+    return ORJSONResponse(dict(document))
 
 
 @router.get("/documents/{document_id}/pdf")
-async def get_document_pdf(document_id: str, db: AsyncSession = Depends(get_db)):
+async def get_document_pdf(
+    document_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)
+):
     """Serve the original PDF file for a document."""
     # Fetch document to get file path
-    stmt = select(Document).where(Document.id == document_id)
+    stmt = select(Document.filename, Document.file_path).where(
+        Document.id == str(document_id)
+    )
     result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
+    document = result.one_or_none()
 
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Check if file_path is stored and file exists
-    if document.file_path and os.path.exists(document.file_path):
-        pdf_path = document.file_path
-    else:
+    stat_result = None
+    if document.file_path:
+        try:
+            stat_result = await aiofiles.os.stat(document.file_path)
+        except FileNotFoundError:
+            pass
+
+    if stat_result is None:
         raise HTTPException(
             status_code=404,
             detail="PDF file not found. The file may not have been saved or was deleted.",
         )
 
-    return FileResponse(
-        pdf_path, media_type="application/pdf", filename=document.filename
-    )
-
-    pdf_path = potential_files[0]
+    # Stored PDFs never change in place, so mtime + size identify the content
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
 
-    if not os.path.exists(pdf_path):
-        raise HTTPException(status_code=404, detail="PDF file not found")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
 
     return FileResponse(
-        pdf_path, media_type="application/pdf", filename=document.filename
+        document.file_path,
+        media_type="application/pdf",
+        filename=document.filename,
+        stat_result=stat_result,
+        headers=headers,
     )
@@ -1,25 +1,62 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, union_all
+import uuid
 
 from app.core.database import get_db
-from app.models import Job
+from app.core.cache import cache_get, cache_set
+from app.models import Job, Document, JobDocument
+from app.models.job import JobStatus
 from app.schemas import JobResponse
 from app.utils.exceptions import NotFound
 
 router = APIRouter(tags=["jobs"])
 
+# Built once so every poll hits the compiled cache and a prepared statement
+_JOB_BY_ID_STMT = select(Job).where(Job.id == bindparam("job_id"))
+_JOB_DOCUMENT_IDS_STMT = union_all(
+    select(Document.id).where(Document.job_id == bindparam("job_id")),
+    # Already-ingested files the job skipped
+    select(JobDocument.document_id).where(JobDocument.job_id == bindparam("job_id")),
+)
+
+# Completed jobs never change, so their responses can be served from Redis.
+# FAILED is not final: process_pdf_task retries and moves the job back to
+# PROCESSING, so caching it would serve a stale status.
+TERMINAL_STATUSES = {JobStatus.COMPLETED.value}
+JOB_CACHE_TTL = 60
+
 
 @router.get("/jobs/{job_id}", response_model=JobResponse)
-async def get_job_status(job_id: str, db: AsyncSession = Depends(get_db)):
+async def get_job_status(job_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """
     Get the current status of a PDF processing job.
     """
-    stmt = select(Job).where(Job.id == job_id)
-    result = await db.execute(stmt)
+    # Let the browser throttle tight polling loops
+    headers = {"Cache-Control": "max-age=2"}
+
+    # Cached bodies were serialized from a JobResponse, send them as-is
+    cache_key = f"job:{job_id}"
+    cached = await cache_get(cache_key)
+    if cached:
+        return Response(cached, media_type="application/json", headers=headers)
+
+    result = await db.execute(_JOB_BY_ID_STMT, {"job_id": str(job_id)})
     job = result.scalar_one_or_none()
 
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
 
-    return job
+    # Row data is trusted: skip validation, and skip FastAPI's response
+    # model round trip by returning the serialized body directly
+    response = JobResponse.from_orm_trusted(job)
+    if job.status in TERMINAL_STATUSES:
+        # A completed job's documents are final: list them once and cache
+        result = await db.execute(_JOB_DOCUMENT_IDS_STMT, {"job_id": str(job_id)})
+        response.document_ids = list(result.scalars())
+        body = response.model_dump_json()
+        await cache_set(cache_key, body, JOB_CACHE_TTL)
+    else:
+        body = response.model_dump_json()
+
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,15 +1,94 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, or_, tuple_, func, cast, Boolean
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import base64
+import uuid
+import orjson
 
 from app.core.database import get_db
 from app.models import Question, Document
 from app.schemas.question import QuestionResponse
+from app.utils.exceptions import ValidationException
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter()
 
+# Rows fetched per round trip when streaming the question listing
+QUESTION_STREAM_BATCH = 200
+
+# Columns needed to build a QuestionResponse, including the document fields.
+# Integer flags are cast to booleans so rows can skip schema validation.
+QUESTION_LIST_COLUMNS = (
+    Question.id,
+    Question.content,
+    Question.part,
+    Question.part_marks,
+    Question.question_number,
+    Question.unit,
+    cast(func.coalesce(Question.is_mcq, 0), Boolean).label("is_mcq"),
+    Question.options,
+    Question.correct_answer,
+    Question.subject,
+    Question.topic,
+    Question.difficulty,
+    Question.question_type,
+    Question.year,
+    Question.marks,
+    Question.page_number,
+    cast(func.coalesce(Question.is_mandatory, 1), Boolean).label("is_mandatory"),
+    cast(func.coalesce(Question.has_or_option, 0), Boolean).label("has_or_option"),
+    Document.course_code,
+    Document.course_name,
+    Document.exam_date,
+)
+
+# Document listing skips file_path/processed_at and other unused columns
+DOCUMENT_LIST_COLUMNS = (
+    Document.id,
+    Document.filename,
+    Document.file_hash,
+    Document.page_count,
+    Document.course_code,
+    Document.course_name,
+    Document.semester,
+    Document.exam_date,
+    Document.total_marks,
+    Document.duration_minutes,
+    Document.exam_type,
+    Document.created_at,
+)
+
+
+def _encode_cursor(created_at: datetime, document_id: str) -> str:
+    """Encode the (created_at, id) of the last row as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{document_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+async def _stream_json_array(rows) -> AsyncIterator[bytes]:
+    """Encode streamed question rows as one JSON array, a row at a time."""
+    yield b"["
+    first = True
+    async for row in rows:
+        if not first:
+            yield b","
+        first = False
+        yield orjson.dumps(QuestionResponse.from_orm_trusted(row).model_dump())
+    yield b"]"
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, document_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), str(uuid.UUID(document_id))
+    except ValueError:
+        raise ValidationException("Invalid cursor")
+
 
 @router.get("/questions", response_model=List[QuestionResponse])
 async def get_all_questions(
@@ -21,11 +100,15 @@ async def get_all_questions(
     exam_type: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get all questions from the database with optional filtering."""
+    """
+    Get all questions from the database with optional filtering.
+
+    Rows are streamed from a server-side cursor, so only one batch is held
+    in memory regardless of `limit`.
+    """
     query = (
-        select(Question)
+        select(*QUESTION_LIST_COLUMNS)
         .join(Document)
-        .options(selectinload(Question.document))
         .order_by(Question.created_at.desc())
     )
 
@@ -49,24 +132,47 @@ async def get_all_questions(
     if exam_type:
         query = query.where(Document.exam_type == exam_type)
 
-    result = await db.execute(query.offset(skip).limit(limit))
-    questions = result.scalars().all()
-    return questions
+    result = await db.stream(
+        query.offset(skip).limit(limit),
+        execution_options={"yield_per": QUESTION_STREAM_BATCH},
+    )
+    return StreamingResponse(
+        _stream_json_array(result.mappings()), media_type="application/json"
+    )
 
 
-@router.get("/documents")
+@router.get("/documents", response_class=ORJSONResponse)
 async def get_all_documents(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     course_code: Optional[str] = None,
     year: Optional[str] = None,
     exam_type: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get all documents from the database with optional filtering."""
+    """
+    Get all documents from the database with optional filtering.
 
-    query = select(Document).order_by(Document.created_at.desc())
+    Pass the X-Next-Cursor header of a page back as `cursor` to fetch the
+    next page with a keyset seek instead of `skip`.
+    """
+
+    query = select(*DOCUMENT_LIST_COLUMNS).order_by(
+        Document.created_at.desc(), Document.id.desc()
+    )
+
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(Document.created_at, Document.id)
+            < tuple_(
+                cursor_created_at,
+                cursor_id,
+                types=[Document.created_at.type, Document.id.type],
+            )
+        )
 
     if search:
         search_term = f"%{search}%"
@@ -85,23 +191,15 @@ async def get_all_documents(
     if exam_type:
         query = query.where(Document.exam_type == exam_type)
 
-    result = await db.execute(query.offset(skip).limit(limit))
-    documents = result.scalars().all()
-
-    return [
-        {
-            "id": str(doc.id),
-            "filename": doc.filename,
-            "file_hash": doc.file_hash,
-            "page_count": doc.page_count,
-            "course_code": doc.course_code,
-            "course_name": doc.course_name,
-            "semester": doc.semester,
-            "exam_date": doc.exam_date,
-            "total_marks": doc.total_marks,
-            "duration_minutes": doc.duration_minutes,
-            "exam_type": doc.exam_type,
-            "created_at": doc.created_at.isoformat() if doc.created_at else None,
-        }
-        for doc in documents
-    ]
+    if not cursor:
+        query = query.offset(skip)
+
+    result = await db.execute(query.limit(limit))
+    documents = result.mappings().all()
+
+    headers = {}
+    if len(documents) == limit:
+        last = documents[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last["created_at"], str(last["id"]))
+
+    return ORJSONResponse([dict(doc) for doc in documents], headers=headers)
@@ -4,17 +4,21 @@ import logging
 
 from app.services.search_service import search_service
 from app.utils.exceptions import ValidationException
+from app.utils.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["search"])
 
 
-@router.get("/search")
+@router.get("/search", response_class=ORJSONResponse)
 async def search(
     q: str = Query(..., min_length=3, max_length=500, description="Search query"),
     limit: int = Query(10, ge=1, le=100, description="Number of results"),
     subject: Optional[str] = Query(None, description="Filter by subject"),
     year: Optional[int] = Query(None, description="Filter by year"),
+    hnsw_ef: Optional[int] = Query(
+        None, ge=1, le=1024, description="HNSW search beam width (recall vs latency)"
+    ),
 ):
     """
     Semantic search for questions.
@@ -29,10 +33,11 @@ async def search(
             filters["year"] = year
 
         results = await search_service.semantic_search(
-            query=q, limit=limit, filters=filters if filters else None
+            query=q, limit=limit, filters=filters if filters else None, hnsw_ef=hnsw_ef
         )
 
-        return results
+        # Plain dicts from the service: encode directly, no jsonable_encoder pass
+        return ORJSONResponse(results)
 
     except ValidationException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -2,9 +2,11 @@ from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+import aiofiles
+import aiofiles.os
+import hashlib
 import uuid
 import os
-import shutil
 import logging
 
 from app.core.database import get_db
@@ -12,19 +14,52 @@ from app.models import Job, Document, JobStatus
 from app.schemas import JobUploadResponse
 from app.utils.exceptions import ValidationException
 from app.config import settings
+from app.services.llama_service import PDF_HEADER, PDF_HEADER_WINDOW
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["upload"])
 
 UPLOAD_DIR = settings.upload_dir
-PERMANENT_STORAGE_DIR = settings.permanent_storage_dir
 MAX_FILE_SIZE = settings.max_file_size_mb * 1024 * 1024
 ALLOWED_TYPES = {"application/pdf"}
+CHUNK_SIZE = 1 << 20  # 1 MiB
 
-# Ensure directories exist
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(PERMANENT_STORAGE_DIR, exist_ok=True)
+
+async def _save_upload(file: UploadFile, file_path: str) -> str:
+    """
+    Stream an uploaded file to disk in fixed-size chunks.
+
+    Enforces MAX_FILE_SIZE while streaming, rejects files without a PDF
+    header, and returns the SHA-256 hex digest of the written bytes.
+    """
+    sha256_hash = hashlib.sha256()
+    total = 0
+    head = b""
+
+    async with aiofiles.open(file_path, "wb") as f:
+        while chunk := await file.read(CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_FILE_SIZE:
+                break
+            if len(head) < PDF_HEADER_WINDOW:
+                head += chunk[: PDF_HEADER_WINDOW - len(head)]
+            sha256_hash.update(chunk)
+            await f.write(chunk)
+
+    if total > MAX_FILE_SIZE:
+        await aiofiles.os.remove(file_path)
+        raise ValidationException(
+            f"{file.filename} exceeds {settings.max_file_size_mb}MB limit"
+        )
+
+    if PDF_HEADER not in head:
+        await aiofiles.os.remove(file_path)
+        raise ValidationException(
+            f"{file.filename} is empty" if not total else f"{file.filename} is not a PDF"
+        )
+
+    return sha256_hash.hexdigest()
 
 
 @router.post("/upload", response_model=JobUploadResponse)
@@ -45,23 +80,19 @@ async def upload_files(
     # Validate files
     filenames = []
     file_paths = []
+    file_hashes = []
 
     for file in files:
         if file.content_type != "application/pdf":
             raise ValidationException(f"{file.filename} is not a PDF")
 
-        # Read file to check size
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise ValidationException(f"{file.filename} exceeds 50MB limit")
+        # Stream file to temporary storage, checking size as we go
+        file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
+        file_hash = await _save_upload(file, file_path)
 
         filenames.append(file.filename)
-
-        # Save file temporarily
-        file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
-        with open(file_path, "wb") as f:
-            f.write(content)
         file_paths.append(file_path)
+        file_hashes.append(file_hash)
 
     try:
         # Create job record
@@ -78,7 +109,7 @@ async def upload_files(
         # Trigger Celery task for background processing
         from app.tasks.pdf_processor import process_pdf_task
 
-        process_pdf_task.delay(job_id, file_paths)
+        process_pdf_task.delay(job_id, file_paths, file_hashes)
 
         logger.info(f"Job {job_id} created and queued for processing")
 
@@ -92,6 +123,6 @@ async def upload_files(
     except Exception as e:
         # Clean up uploaded files on error
         for fpath in file_paths:
-            if os.path.exists(fpath):
-                os.remove(fpath)
+            if await aiofiles.os.path.exists(fpath):
+                await aiofiles.os.remove(fpath)
         raise HTTPException(status_code=500, detail=str(e))
@@ -8,13 +8,52 @@ class Settings(BaseSettings):
     celery_broker_url: str
     qdrant_host: str
     qdrant_port: int
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = True  # protobuf instead of JSON for points
     llama_api_key: str = ""  # For backward compatibility with LlamaParse
     llama_cloud_api_key: str = ""  # For LlamaExtract
+    llama_extract_concurrency: int = 10  # In-flight extractions per batch
     secret_key: str
 
+    # Run Base.metadata.create_all on startup (dev/tests); use Alembic otherwise
+    auto_create_schema: bool = False
+
+    # Connection pool (size + overflow must fit Postgres max_connections)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = False
+
+    # asyncpg statement caches (per connection)
+    db_statement_cache_size: int = 1024
+    db_prepared_statement_cache_size: int = 256
+
+    # Semantic search result cache
+    semantic_cache_capacity: int = 1024
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_ttl: float = 300.0
+    semantic_cache_half_precision: bool = False
+
+    # Embedding model
+    embedding_batch_size: int = 64
+    embedding_cache_size: int = 4096
+    preload_embedding_model: bool = True  # load at startup, not on first use
+    # "torch" or "onnx" (ONNX Runtime; install the `onnx` extra)
+    embedding_backend: str = "torch"
+    # ONNX file inside the model repo, e.g. "onnx/model_qint8_avx2.onnx" for
+    # the int8-quantized export; empty uses the default onnx/model.onnx
+    embedding_onnx_file: str = ""
+    # Empty picks CUDA when available, else CPU
+    embedding_device: str = ""
+    # Run the torch model in fp16 on CUDA
+    embedding_half_precision: bool = True
+
     # File storage
     upload_dir: str = "/tmp/qp_uploads"
     permanent_storage_dir: str = "./storage/pdfs"  # Permanent storage for PDFs
+    # LlamaExtract results keyed by PDF content; empty disables the cache
+    extraction_cache_dir: str = "./storage/extractions"
     max_file_size_mb: int = 50
 
     class Config:
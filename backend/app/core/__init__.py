@@ -1,4 +1,14 @@
 from app.core.database import engine, async_session, Base, get_db
-from app.core.qdrant import qdrant_service
+from app.core.qdrant import get_qdrant_service
+from app.core.cache import redis_client, cache_get, cache_set
 
-__all__ = ["engine", "async_session", "Base", "get_db", "qdrant_service"]
+__all__ = [
+    "engine",
+    "async_session",
+    "Base",
+    "get_db",
+    "get_qdrant_service",
+    "redis_client",
+    "cache_get",
+    "cache_set",
+]
@@ -0,0 +1,26 @@
+import redis.asyncio as redis
+from app.config import settings
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Connections are opened lazily on first command
+redis_client = redis.from_url(settings.redis_url)
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Read a cached value; a Redis outage is treated as a miss."""
+    try:
+        return await redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+
+
+async def cache_set(key: str, value: str, ttl: int) -> None:
+    """Store a value with a TTL in seconds; failures are logged and ignored."""
+    try:
+        await redis_client.set(key, value, ex=ttl)
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
@@ -1,14 +1,27 @@
+from sqlalchemy import DDL, event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
+# asyncpg statement caches; other drivers reject these
+connect_args = {}
+if make_url(settings.database_url).get_driver_name() == "asyncpg":
+    connect_args = {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    }
+
 engine = create_async_engine(
     settings.database_url,
     echo=False,
     future=True,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=0,
+    # Recycling (not pinging) by default, so a checkout costs no extra round trip
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    connect_args=connect_args,
 )
 
 async_session = sessionmaker(
@@ -26,3 +39,10 @@ async def get_db():
 
 
 Base = declarative_base()
+
+# Trigram indexes need pg_trgm before create_all builds them
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,36 +1,143 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    Filter,
+    FieldCondition,
+    MatchValue,
+    QueryRequest,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+)
 from app.config import settings
+from functools import lru_cache
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Payload stored with every question point
+PAYLOAD_KEYS = (
+    "question_id",
+    "text",
+    "subject",
+    "topic",
+    "difficulty",
+    "question_type",
+    "year",
+    "marks",
+    "document_id",
+    "page_number",
+)
+
+# int8 copies of the vectors are kept in RAM for scoring (4x smaller than
+# float32); the originals are kept for rescoring the top candidates
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    )
+)
+
+# Payload fields used in search filters, indexed so Qdrant can filter
+# during HNSW traversal instead of post-filtering candidates
+PAYLOAD_INDEXES = {
+    "subject": PayloadSchemaType.KEYWORD,
+    "difficulty": PayloadSchemaType.KEYWORD,
+    "question_type": PayloadSchemaType.KEYWORD,
+    "document_id": PayloadSchemaType.KEYWORD,
+    "year": PayloadSchemaType.INTEGER,
+    "page_number": PayloadSchemaType.INTEGER,
+    "marks": PayloadSchemaType.INTEGER,
+}
+
 
 class QdrantService:
     def __init__(self):
         self.client = QdrantClient(
             host=settings.qdrant_host,
             port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc,
             timeout=30
         )
         self.collection_name = "questions"
         self.vector_size = 384
-        self._ensure_collection()
+        self.min_hnsw_ef = 40
+        # Candidates fetched from the int8 index per result, then rescored
+        # against the original float32 vectors
+        self.quantization_oversampling = 2.0
+        self.upload_batch_size = 256
+        self._collection_ready = False
+
+    def ensure_collection(self):
+        """Make sure the collection exists (checked once per process)."""
+        if not self._collection_ready:
+            self._ensure_collection()
+            self._collection_ready = True
 
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
-        try:
-            self.client.get_collection(self.collection_name)
+        """Create the collection and its payload indexes if missing."""
+        if self.client.collection_exists(self.collection_name):
             logger.info(f"Collection '{self.collection_name}' already exists")
-        except:
-            logger.info(f"Creating collection '{self.collection_name}'...")
-            self.client.create_collection(
+            self._ensure_quantization()
+        else:
+            self._create_collection()
+
+        self._ensure_payload_indexes()
+
+    def _create_collection(self):
+        logger.info(f"Creating collection '{self.collection_name}'...")
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=self.vector_size,
+                distance=Distance.COSINE
+            ),
+            quantization_config=QUANTIZATION_CONFIG,
+        )
+
+    def _ensure_quantization(self):
+        """Enable int8 quantization on collections created before it existed."""
+        info = self.client.get_collection(self.collection_name)
+        if info.config.quantization_config is None:
+            logger.info(f"Enabling int8 quantization on '{self.collection_name}'")
+            self.client.update_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.vector_size,
-                    distance=Distance.COSINE
-                )
+                quantization_config=QUANTIZATION_CONFIG,
+            )
+
+    def _search_params(self, limit: int, hnsw_ef: Optional[int] = None) -> SearchParams:
+        return SearchParams(
+            # Widen the HNSW beam with the page size so filtered searches
+            # still find enough matching neighbours, unless the caller picks
+            # its own recall/latency trade-off.
+            hnsw_ef=hnsw_ef or max(limit * 4, self.min_hnsw_ef),
+            quantization=QuantizationSearchParams(
+                rescore=True,
+                oversampling=self.quantization_oversampling,
+            ),
+        )
+
+    def _ensure_payload_indexes(self):
+        """Create any payload indexes the collection is still missing."""
+        existing = self.client.get_collection(self.collection_name).payload_schema
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            logger.info(f"Creating payload index on '{field_name}'")
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
             )
 
     async def index_questions(self, questions: List[Dict]) -> int:
@@ -38,7 +145,7 @@ class QdrantService:
         Index questions with embeddings into Qdrant.
 
         Args:
-            questions: List of dicts with id, vector (embedding), question_id, text, metadata
+            questions: List of dicts with vector (embedding), question_id, text, metadata
 
         Returns:
             Number of indexed points
@@ -46,63 +153,102 @@ class QdrantService:
         if not questions:
             return 0
 
-        points = []
-        for idx, q in enumerate(questions):
-            point = PointStruct(
-                id=idx,  # Simple sequential ID for MVP
-                vector=q.get("vector", [0.0] * self.vector_size),
-                payload={
-                    "question_id": q.get("question_id"),
-                    "text": q.get("text", ""),
-                    "subject": q.get("subject"),
-                    "topic": q.get("topic"),
-                    "difficulty": q.get("difficulty"),
-                    "question_type": q.get("question_type"),
-                    "year": q.get("year"),
-                    "marks": q.get("marks"),
-                    "document_id": q.get("document_id"),
-                    "page_number": q.get("page_number"),
-                }
-            )
-            points.append(point)
+        await asyncio.to_thread(self.ensure_collection)
+
+        default_vector = np.zeros(self.vector_size, dtype=np.float32)
+        # Every payload carries all keys (None when unknown) so search
+        # results can be built from the payload alone.
+        payloads = (
+            {key: q.get(key) for key in PAYLOAD_KEYS} | {"text": q.get("text", "")}
+            for q in questions
+        )
+        # One (n, dim) float32 matrix, which upload_collection sends as-is
+        vectors = np.vstack(
+            [q.get("vector", default_vector) for q in questions]
+        ).astype(np.float32, copy=False)
 
         try:
-            self.client.upsert(
+            # Batched upload in a worker thread so the event loop stays free
+            await asyncio.to_thread(
+                self.client.upload_collection,
                 collection_name=self.collection_name,
-                points=points
+                vectors=vectors,
+                payload=payloads,
+                # The question UUID is the point id: unique across jobs, and
+                # re-indexing a question overwrites its own point
+                ids=[q["question_id"] for q in questions],
+                batch_size=self.upload_batch_size,
+                max_retries=3,
+                wait=False,
             )
-            logger.info(f"Indexed {len(points)} questions into Qdrant")
-            return len(points)
+            logger.info(f"Indexed {len(questions)} questions into Qdrant")
+            return len(questions)
         except Exception as e:
             logger.error(f"Failed to index questions: {e}")
             raise
 
-    async def search(
+    def _build_filter(self, filters: Optional[Dict]) -> Optional[Filter]:
+        """Turn {payload_key: value} filters into a Qdrant must-match filter."""
+        if not filters:
+            return None
+
+        return Filter(
+            must=[
+                FieldCondition(key=key, match=MatchValue(value=value))
+                for key, value in filters.items()
+            ]
+        )
+
+    async def search_batch(
         self,
-        query_vector: List[float],
+        query_vectors: List[Union[np.ndarray, List[float]]],
         limit: int = 10,
-        filters: Optional[Dict] = None
-    ) -> List[Dict]:
+        filters: Optional[Dict] = None,
+        hnsw_ef: Optional[int] = None
+    ) -> List[List[Dict]]:
         """
-        Search for similar questions using semantic similarity.
+        Run several similarity searches in a single Qdrant request.
+
+        `hnsw_ef` overrides the HNSW search beam width (higher is slower but
+        more accurate). Returns one result list per query vector, in the
+        same order.
         """
+        if not query_vectors:
+            return []
+
+        query_filter = self._build_filter(filters)
+        search_params = self._search_params(limit, hnsw_ef)
+        requests = [
+            QueryRequest(
+                query=np.asarray(vector, dtype=np.float32).tolist(),
+                filter=query_filter,
+                params=search_params,
+                limit=limit,
+                with_payload=True,
+            )
+            for vector in query_vectors
+        ]
+
         try:
-            results = self.client.search(
+            responses = await asyncio.to_thread(
+                self.client.query_batch_points,
                 collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit
+                requests=requests,
             )
 
             return [
-                {
-                    "id": result.id,
-                    "score": result.score,
-                    "payload": result.payload
-                }
-                for result in results
+                [
+                    {
+                        "id": point.id,
+                        "score": point.score,
+                        "payload": point.payload
+                    }
+                    for point in response.points
+                ]
+                for response in responses
             ]
         except Exception as e:
-            logger.error(f"Search failed: {e}")
+            logger.error(f"Batch search failed: {e}")
             raise
 
     async def delete_collection(self):
@@ -110,8 +256,11 @@ class QdrantService:
         try:
             self.client.delete_collection(self.collection_name)
             logger.info(f"Deleted collection '{self.collection_name}'")
-        except:
+        except UnexpectedResponse:
             pass
 
 
-qdrant_service = QdrantService()
+@lru_cache
+def get_qdrant_service() -> QdrantService:
+    """Shared QdrantService, created on first use rather than at import."""
+    return QdrantService()
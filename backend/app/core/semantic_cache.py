@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from app.config import settings
+import numpy as np
+import logging
+import time
+from typing import Any, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    In-process cache of search results keyed by query embedding.
+
+    A lookup matches the nearest cached embedding in the same namespace
+    (collection, limit, filters) when its cosine similarity reaches the
+    threshold. Entries expire after `ttl` seconds and the least recently
+    used one is evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        dim: int = 384,
+        capacity: int = 1024,
+        threshold: float = 0.95,
+        ttl: float = 300.0,
+        half_precision: bool = False,
+    ):
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+
+        # Unit-length embeddings, one row per slot. float16 halves the
+        # memory but numpy has no BLAS kernel for it, so lookups are slower
+        # than the float32 GEMV.
+        self.dtype = np.float16 if half_precision else np.float32
+        self._vectors = np.zeros((capacity, dim), dtype=self.dtype)
+        self._namespaces = np.zeros(capacity, dtype=np.int64)
+        self._expires_at = np.zeros(capacity, dtype=np.float64)
+        self._results: List[Any] = [None] * capacity
+        # Occupied slots, least recently used first
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        q = np.ascontiguousarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if not norm:
+            return None
+        # Not in place: the caller's own array may have been passed through
+        return q / norm
+
+    def lookup(self, vector, namespace: Hashable) -> Optional[Any]:
+        """Return cached results for a near-identical query, or None."""
+        q = self._normalize(vector)
+        if q is None or not self._lru:
+            self.misses += 1
+            return None
+
+        # Rows outside the namespace or past their TTL can never match
+        live = (self._namespaces == hash(namespace)) & (
+            self._expires_at > time.monotonic()
+        )
+        scores = np.where(
+            live, self._vectors @ q.astype(self.dtype, copy=False), -np.inf
+        )
+        slot = int(np.argmax(scores))
+
+        if scores[slot] < self.threshold:
+            self.misses += 1
+            return None
+
+        self._lru.move_to_end(slot)
+        self.hits += 1
+        return self._results[slot]
+
+    def store(self, vector, namespace: Hashable, results: Any) -> None:
+        """Cache results for a query embedding, evicting the LRU slot if full."""
+        q = self._normalize(vector)
+        if q is None:
+            return
+
+        if len(self._lru) < self.capacity:
+            slot = len(self._lru)
+        else:
+            slot, _ = self._lru.popitem(last=False)
+
+        self._vectors[slot] = q
+        self._namespaces[slot] = hash(namespace)
+        self._expires_at[slot] = time.monotonic() + self.ttl
+        self._results[slot] = results
+        self._lru[slot] = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+semantic_cache = SemanticCache(
+    capacity=settings.semantic_cache_capacity,
+    threshold=settings.semantic_cache_threshold,
+    ttl=settings.semantic_cache_ttl,
+    half_precision=settings.semantic_cache_half_precision,
+)
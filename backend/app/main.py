@@ -2,17 +2,51 @@ from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from sqlalchemy import text
+import asyncio
+import os
 
+from app.config import settings
 from app.core.database import engine, Base
+from app.core.qdrant import get_qdrant_service
+from app.services.embedding_service import embedding_service
 from app.utils.exceptions import ApplicationException
 
+# pg_advisory_lock key serializing Qdrant collection setup across workers
+QDRANT_SETUP_LOCK_KEY = 0x71647274
+
 
-# Create tables on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    os.makedirs(settings.permanent_storage_dir, exist_ok=True)
+
+    # Schema is managed by Alembic (`alembic upgrade head`); create_all is
+    # an opt-in shortcut for throwaway databases
+    if settings.auto_create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    # Only one worker at a time checks/creates the Qdrant collection
+    async with engine.connect() as conn:
+        locked = conn.dialect.name == "postgresql"
+        if locked:
+            await conn.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": QDRANT_SETUP_LOCK_KEY}
+            )
+        try:
+            # Building the client also does a blocking version check
+            await asyncio.to_thread(lambda: get_qdrant_service().ensure_collection())
+        finally:
+            if locked:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": QDRANT_SETUP_LOCK_KEY},
+                )
+
+    if settings.preload_embedding_model:
+        await asyncio.to_thread(embedding_service.preload)
     yield
     # Shutdown
     await engine.dispose()
@@ -36,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -2,5 +2,6 @@ from app.models.job import Job, JobStatus
 from app.models.document import Document
 from app.models.question import Question
 from app.models.review import QuestionReview
+from app.models.job_document import JobDocument
 
-__all__ = ["Job", "JobStatus", "Document", "Question", "QuestionReview"]
+__all__ = ["Job", "JobStatus", "Document", "Question", "QuestionReview", "JobDocument"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Boolean, Index, Uuid
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,8 +9,8 @@ from app.core.database import Base
 class Document(Base):
     __tablename__ = "documents"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    job_id = Column(String(36), ForeignKey("jobs.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(Uuid(as_uuid=False), ForeignKey("jobs.id"), nullable=False, index=True)
     filename = Column(String(255), nullable=False)
     file_hash = Column(String(64), nullable=True)  # SHA-256
     file_path = Column(String(512), nullable=True)  # Path to stored PDF
@@ -30,9 +30,34 @@ class Document(Base):
     exam_type = Column(String(50), nullable=True)  # e.g., "End Semester", "Mid Term"
 
     # Relationships
-    job = relationship("Job", back_populates="documents")
+    job = relationship("Job", back_populates="documents", lazy="raise_on_sql")
     questions = relationship(
-        "Question", back_populates="document", cascade="all, delete-orphan"
+        "Question",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+    )
+
+    __table_args__ = (
+        Index("ix_documents_created_at_id", created_at.desc(), id.desc()),
+        # Library filters use exam_type = ?; most rows leave it unset
+        Index(
+            "ix_documents_exam_type",
+            exam_type,
+            postgresql_where=exam_type.isnot(None),
+        ),
+        # Re-uploads of an ingested PDF are found by content hash
+        Index("ix_documents_file_hash", file_hash),
+        # Trigram indexes back the ILIKE '%term%' library filters
+        *(
+            Index(
+                f"ix_documents_{name}_trgm",
+                name,
+                postgresql_using="gin",
+                postgresql_ops={name: "gin_trgm_ops"},
+            )
+            for name in ("filename", "course_name", "course_code", "exam_date")
+        ),
     )
 
     def __repr__(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Text, Enum
+from sqlalchemy import Column, String, DateTime, Integer, Text, Enum, Uuid
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -17,7 +17,7 @@ class JobStatus(str, enum.Enum):
 class Job(Base):
     __tablename__ = "jobs"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     status = Column(String(20), default=JobStatus.QUEUED.value, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -28,7 +28,12 @@ class Job(Base):
     processed_pages = Column(Integer, default=0)
 
     # Relationships
-    documents = relationship("Document", back_populates="job", cascade="all, delete-orphan")
+    documents = relationship(
+        "Document",
+        back_populates="job",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+    )
 
     def __repr__(self):
         return f"<Job {self.id}: {self.status}>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Uuid, func
+
+from app.core.database import Base
+
+
+class JobDocument(Base):
+    """Links a job to a document ingested by an earlier job (duplicate upload)."""
+
+    __tablename__ = "job_documents"
+
+    job_id = Column(Uuid(as_uuid=False), ForeignKey("jobs.id"), primary_key=True)
+    document_id = Column(
+        Uuid(as_uuid=False), ForeignKey("documents.id"), primary_key=True, index=True
+    )
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<JobDocument job {self.job_id}: document {self.document_id}>"
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Float, JSON, Text
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Float, JSON, Text, Index, Uuid, inspect
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,10 +10,10 @@ from app.core.database import Base
 class Question(Base):
     __tablename__ = "questions"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    document_id = Column(String(36), ForeignKey("documents.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = Column(Uuid(as_uuid=False), ForeignKey("documents.id"), nullable=False)
     content = Column(Text, nullable=False)
-    qdrant_id = Column(Integer, nullable=True)  # Qdrant point ID
+    qdrant_id = Column(Uuid(as_uuid=False), nullable=True)  # Qdrant point ID (= id once indexed)
 
     # Part information
     part = Column(String(10), nullable=True)  # "A", "B", "C"
@@ -22,7 +23,7 @@ class Question(Base):
 
     # MCQ specific
     is_mcq = Column(Integer, default=0)  # SQLite doesn't have Boolean, using Integer
-    options = Column(JSON, nullable=True)  # {"A": "...", "B": "...", ...}
+    options = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)  # {"A": "...", "B": "...", ...}
     correct_answer = Column(String(10), nullable=True)  # if available
 
     # Metadata
@@ -41,19 +42,50 @@ class Question(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    document = relationship("Document", back_populates="questions")
+    document = relationship(
+        "Document", back_populates="questions", lazy="raise_on_sql"
+    )
+
+    __table_args__ = (
+        # Document details filter on document_id; its question_number sort
+        # happens inside json_agg, which an index can't feed
+        Index("ix_questions_document_id", document_id),
+        # Trigram indexes back the ILIKE '%term%' library filters
+        Index(
+            "ix_questions_content_trgm",
+            content,
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_questions_subject_trgm",
+            subject,
+            postgresql_using="gin",
+            postgresql_ops={"subject": "gin_trgm_ops"},
+        ),
+    )
 
     def __repr__(self):
         return f"<Question {self.id}: {self.subject}>"
 
+    def _loaded_document(self):
+        # document is lazy="raise_on_sql": only read it when already loaded,
+        # so QuestionResponse.model_validate(question) never emits SQL
+        if "document" in inspect(self).unloaded:
+            return None
+        return self.document
+
     @property
     def course_code(self):
-        return self.document.course_code if self.document else None
+        document = self._loaded_document()
+        return document.course_code if document else None
 
     @property
     def course_name(self):
-        return self.document.course_name if self.document else None
+        document = self._loaded_document()
+        return document.course_name if document else None
 
     @property
     def exam_date(self):
-        return self.document.exam_date if self.document else None
+        document = self._loaded_document()
+        return document.exam_date if document else None
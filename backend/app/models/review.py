@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
-from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index, Uuid, func
 import uuid
 
 from app.core.database import Base
@@ -10,16 +9,24 @@ class QuestionReview(Base):
 
     __tablename__ = "question_reviews"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    question_id = Column(String(36), ForeignKey("questions.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    question_id = Column(Uuid(as_uuid=False), ForeignKey("questions.id"), nullable=False)
     # In future, add user_id when authentication is implemented
-    # user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    # user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
     marked_for_review = Column(Boolean, default=True, nullable=False)
     notes = Column(String(1000), nullable=True)  # Optional notes
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Filled in by the database; eager_defaults reads them back via RETURNING
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
+    __table_args__ = (
+        # Per-question review lookups; also serves as the question_id FK index
+        Index("ix_question_reviews_question_id_marked", question_id, marked_for_review),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<QuestionReview {self.id}: Question {self.question_id}>"
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from collections.abc import Mapping
+from typing import Any
+
+
+class TrustedModel(BaseModel):
+    """Response schema that can be built from database data without validation."""
+
+    @classmethod
+    def from_orm_trusted(cls, obj: Any):
+        """
+        Build an instance from an ORM object or row mapping, skipping validation.
+
+        Only for data read from our own database: values must already have
+        the field types (e.g. bool, not 0/1), since nothing is coerced.
+        """
+        if isinstance(obj, Mapping):
+            data = {name: obj[name] for name in cls.model_fields if name in obj}
+        else:
+            data = {
+                name: getattr(obj, name)
+                for name in cls.model_fields
+                if hasattr(obj, name)
+            }
+        return cls.model_construct(**data)
@@ -2,9 +2,10 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from app.models.job import JobStatus
+from app.schemas.base import TrustedModel
 
 
-class JobResponse(BaseModel):
+class JobResponse(TrustedModel):
     id: str
     status: JobStatus
     created_at: datetime
@@ -14,10 +15,20 @@ class JobResponse(BaseModel):
     total_questions: int = 0
     processed_pages: int = 0
     error_message: Optional[str] = None
+    # Documents the job produced, plus earlier ones its duplicate uploads
+    # were linked to; filled in once the job completes
+    document_ids: List[str] = []
 
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_orm_trusted(cls, obj):
+        job = super().from_orm_trusted(obj)
+        # Stored as a plain string on the Job row
+        job.status = JobStatus(job.status)
+        return job
+
 
 class JobUploadResponse(BaseModel):
     job_id: str
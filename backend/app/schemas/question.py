@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict
+from app.schemas.base import TrustedModel
 
 
-class QuestionResponse(BaseModel):
+class QuestionResponse(TrustedModel):
     id: str
     content: str
     
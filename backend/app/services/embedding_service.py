@@ -1,5 +1,13 @@
+from app.config import settings
+from collections import OrderedDict
+import asyncio
+import contextlib
+import hashlib
 import logging
-from typing import List
+import numpy as np
+import os
+import threading
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -10,53 +18,215 @@ class EmbeddingService:
         # Will load model when sentence-transformers is installed
         self.model = None
         self.embedding_dim = 384
+        self.batch_size = settings.embedding_batch_size
+        self.device: Optional[str] = None
+
+        # LRU of single-text embeddings keyed by a short digest of the text
+        self.cache_size = settings.embedding_cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # torch already spreads one batch over every core; concurrent encodes
+        # would only oversubscribe them
+        self._encode_lock = threading.Lock()
+
+        # Concurrent embed() calls are encoded together after a short window
+        self.batch_window = 0.01
+        self._pending = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+
+    def preload(self):
+        """Load the model up front so the first request doesn't pay for it."""
+        self._ensure_model()
 
     def _ensure_model(self):
         """Lazy load the model."""
         if self.model is None:
+            # Must be set before the tokenizers library is first imported
+            os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
             try:
                 from sentence_transformers import SentenceTransformer
                 logger.info("Loading sentence transformer model...")
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
+                model_kwargs = {}
+                if settings.embedding_onnx_file:
+                    model_kwargs["file_name"] = settings.embedding_onnx_file
+                device = settings.embedding_device or self._default_device()
+                model = SentenceTransformer(
+                    'all-MiniLM-L6-v2',
+                    device=device,
+                    backend=settings.embedding_backend,
+                    model_kwargs=model_kwargs or None,
+                )
+                if settings.embedding_backend == "torch":
+                    model.eval()
+                    if device.startswith("cuda") and settings.embedding_half_precision:
+                        model.half()
+                logger.info(f"Embedding model running on {device}")
+                self.device = device
+                self.model = model
             except ImportError:
                 logger.warning("sentence-transformers not installed, using stub")
 
-    def generate_embedding(self, text: str) -> List[float]:
+    @staticmethod
+    def _default_device() -> str:
+        try:
+            import torch
+        except ImportError:
+            return "cpu"
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _zeros(self, count: Optional[int] = None) -> np.ndarray:
+        shape = self.embedding_dim if count is None else (count, self.embedding_dim)
+        return np.zeros(shape, dtype=np.float32)
+
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
-        Generate 384-dimensional embedding for text.
+        Generate 384-dimensional float32 embedding for text.
         """
         if not text or not text.strip():
-            return [0.0] * self.embedding_dim
+            return self._zeros()
+
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
 
         self._ensure_model()
         
         if self.model is None:
             # Return zero vector if model not available
-            return [0.0] * self.embedding_dim
+            return self._zeros()
 
-        embedding = self.model.encode(text, convert_to_tensor=False)
-        return embedding.tolist()
+        embedding = self._encode([text])[0]
+        self._cache_put(key, embedding)
+        return embedding
 
-    async def batch_generate(self, texts: List[str]) -> List[List[float]]:
+    async def embed(self, text: str) -> np.ndarray:
         """
-        Generate embeddings for multiple texts efficiently.
+        Async variant of generate_embedding for request handlers.
+
+        Cache misses are queued and encoded in one batch with any other
+        texts submitted within `batch_window` seconds, off the event loop.
         """
-        if not texts:
-            return []
+        if not text or not text.strip():
+            return self._zeros()
+
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, key, future))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.batch_window, self._start_flush, loop
+            )
+
+        return await future
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            # Keep a reference so the task isn't garbage-collected mid-flight
+            task = loop.create_task(self._flush(pending))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending):
+        try:
+            embeddings = await asyncio.to_thread(
+                self._encode_or_zeros, [text for text, _, _ in pending]
+            )
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
 
-        # Filter out empty texts
-        valid_texts = [t for t in texts if t and t.strip()]
-        if not valid_texts:
-            return [[0.0] * self.embedding_dim] * len(texts)
+        for (_, key, future), embedding in zip(pending, embeddings):
+            self._cache_put(key, embedding)
+            if not future.done():
+                future.set_result(embedding)
 
+    def _encode_or_zeros(self, texts: List[str]) -> np.ndarray:
+        """Encode non-empty texts, or return zero vectors without a model."""
         self._ensure_model()
-        
         if self.model is None:
-            # Return zero vectors if model not available
-            return [[0.0] * self.embedding_dim] * len(texts)
+            return self._zeros(len(texts))
+        return self._encode(texts)
+
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        # all-MiniLM-L6-v2 is uncased and splits on whitespace, so queries
+        # differing only in case or spacing share one embedding
+        normalized = " ".join(text.lower().split())
+        return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            return embedding
+
+    def _cache_put(self, key: bytes, embedding: np.ndarray):
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def batch_generate(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts efficiently.
+
+        Returns a (len(texts), 384) float32 array, one row per text.
+        """
+        if not texts:
+            return self._zeros(0)
+
+        # Filter out empty texts (they get zero vectors in their slot)
+        valid_positions = [i for i, t in enumerate(texts) if t and t.strip()]
+        if not valid_positions:
+            return self._zeros(len(texts))
+
+        # Encode in a worker thread so the caller's other I/O keeps running
+        embeddings = await asyncio.to_thread(
+            self._encode_or_zeros, [texts[i] for i in valid_positions]
+        )
+        if len(valid_positions) == len(texts):
+            return embeddings
+
+        results = self._zeros(len(texts))
+        results[valid_positions] = embeddings
+        return results
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into unit-length vectors, without autograd bookkeeping."""
+        if settings.embedding_backend == "torch":
+            import torch
+
+            grad_mode = torch.inference_mode()
+        else:
+            # ONNX/OpenVINO backends don't need torch installed
+            grad_mode = contextlib.nullcontext()
 
-        embeddings = self.model.encode(valid_texts, convert_to_tensor=False)
-        return embeddings.tolist()
+        # Batches are length-sorted and padded to their longest text, not
+        # to max_seq_length
+        with self._encode_lock, grad_mode:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                device=self.device,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        # fp16 on GPU; callers and Qdrant expect float32
+        return embeddings.astype(np.float32, copy=False)
 
 
 embedding_service = EmbeddingService()
@@ -2,11 +2,34 @@ from llama_cloud_services import LlamaExtract
 from app.config import settings
 from app.schemas.question import ExamPaperMetadata
 import logging
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterator, List, Optional, Union
+import asyncio
+import hashlib
+import itertools
+import orjson
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# PDF readers accept the "%PDF-" header anywhere in the first 1 KiB
+PDF_HEADER = b"%PDF-"
+PDF_HEADER_WINDOW = 1024
+
+# Unit of each Part A question, indexed by question number (4 per unit)
+_PART_A_UNITS = (0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5)
+# Unit of Part B questions 21-25
+_PART_B_UNITS = (1, 2, 3, 4, 5)
+
+
+def _leading_int(value) -> Optional[int]:
+    """Leading digits of a question number as an int (21 for "21.a")."""
+    s = str(value)
+    i = 0
+    while i < len(s) and s[i].isdecimal():
+        i += 1
+    return int(s[:i]) if i else None
+
 
 class LlamaCloudService:
     """Service for extracting structured data from exam papers using LlamaExtract."""
@@ -22,6 +45,7 @@ class LlamaCloudService:
             self.extractor = LlamaExtract(api_key=api_key)
             self.agent_name = "SRM PYQ"  # Pre-configured agent with exam schema
             self.agent = None
+            self._agent_lock = threading.Lock()
             logger.info("LlamaExtract initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize LlamaExtract: {e}")
@@ -29,19 +53,27 @@ class LlamaCloudService:
 
     def _get_agent(self):
         """Get or cache the extraction agent."""
-        if self.agent is None:
-            try:
-                self.agent = self.extractor.get_agent(name=self.agent_name)
-                logger.info(f"Retrieved extraction agent: {self.agent_name}")
-            except Exception as e:
-                logger.error(f"Failed to get agent '{self.agent_name}': {e}")
-                raise
+        if self.agent is not None:
+            return self.agent
+
+        # Only one caller fetches the agent; the rest wait and reuse it
+        with self._agent_lock:
+            if self.agent is None:
+                try:
+                    self.agent = self.extractor.get_agent(name=self.agent_name)
+                    logger.info(f"Retrieved extraction agent: {self.agent_name}")
+                except Exception as e:
+                    logger.error(f"Failed to get agent '{self.agent_name}': {e}")
+                    raise
         return self.agent
 
-    async def extract_from_pdf(self, file_path: str) -> Dict:
+    async def extract_from_pdf(self, file_path: str, file_hash: Optional[str] = None) -> Dict:
         """
         Extract structured data from PDF using LlamaExtract API with pre-configured agent.
 
+        `file_hash` is the PDF's SHA-256 hex digest when the caller already
+        has it; it keys the extraction cache without re-reading the file.
+
         Returns:
         {
             "text": "full markdown content",
@@ -55,22 +87,40 @@ class LlamaCloudService:
 
         try:
             logger.info(f"Extracting from PDF: {file_path}")
-            
-            # Get the pre-configured agent
-            agent = self._get_agent()
-            
-            # Extract data using the agent (this uses the schema you defined)
-            result = agent.extract(file_path)
-            
-            # The result contains structured data according to your schema
-            structured_data = result.data if hasattr(result, 'data') else {}
-            
-            # Convert to dict if it's a Pydantic model
-            if hasattr(structured_data, 'dict'):
-                structured_data = structured_data.dict()
-            elif hasattr(structured_data, 'model_dump'):
-                structured_data = structured_data.model_dump()
-            
+
+            # Don't spend a LlamaCloud call on a file it will reject, and let
+            # re-uploads of the same PDF reuse the earlier extraction. Both
+            # read the file, so do them in one worker thread.
+            cache_path = await asyncio.to_thread(
+                self._validate_and_cache_path, file_path, file_hash
+            )
+            structured_data = None
+            if cache_path:
+                structured_data = await asyncio.to_thread(self._cache_load, cache_path)
+
+            if structured_data is not None:
+                logger.info(f"Using cached extraction for {file_path}")
+            else:
+                # Get the pre-configured agent
+                agent = self._get_agent()
+
+                # Extract data using the agent (this uses the schema you defined).
+                # The client call blocks for the whole upload and extraction.
+                result = await asyncio.to_thread(agent.extract, file_path)
+
+                # The result contains structured data according to your schema
+                structured_data = getattr(result, 'data', {})
+
+                # Convert to dict if it's a Pydantic model (v2 first; .dict() is deprecated)
+                dump = getattr(structured_data, 'model_dump', None) or getattr(
+                    structured_data, 'dict', None
+                )
+                if dump is not None:
+                    structured_data = dump()
+
+                if cache_path and isinstance(structured_data, dict):
+                    await asyncio.to_thread(self._cache_store, cache_path, structured_data)
+
             logger.info(f"Successfully extracted structured data from {file_path}")
             logger.debug(f"Structured data keys: {structured_data.keys() if isinstance(structured_data, dict) else 'N/A'}")
             
@@ -88,75 +138,168 @@ class LlamaCloudService:
             logger.error(f"LlamaExtract extraction failed for {file_path}: {e}")
             raise
 
+    @staticmethod
+    def _validate_pdf(file_path: str):
+        """Raise ValueError unless the file is non-empty and has a PDF header."""
+        with open(file_path, "rb") as f:
+            head = f.read(PDF_HEADER_WINDOW)
+        if not head:
+            raise ValueError(f"{file_path} is empty")
+        if PDF_HEADER not in head:
+            raise ValueError(f"{file_path} is not a PDF")
+
+    def _validate_and_cache_path(
+        self, file_path: str, file_hash: Optional[str] = None
+    ) -> Optional[str]:
+        self._validate_pdf(file_path)
+        return self._cache_path(file_path, file_hash)
+
+    def _cache_path(self, file_path: str, file_hash: Optional[str] = None) -> Optional[str]:
+        """Extraction cache file for a PDF, keyed by the agent and the file's SHA-256."""
+        if not settings.extraction_cache_dir:
+            return None
+
+        if file_hash is None:
+            sha256 = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            file_hash = sha256.hexdigest()
+        digest = hashlib.blake2b(self.agent_name.encode(), digest_size=16)
+        digest.update(file_hash.encode())
+        return os.path.join(settings.extraction_cache_dir, f"{digest.hexdigest()}.json")
+
+    @staticmethod
+    def _cache_load(cache_path: str) -> Optional[Dict]:
+        try:
+            with open(cache_path, "rb") as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable extraction cache {cache_path}: {e}")
+            return None
+
+    @staticmethod
+    def _cache_store(cache_path: str, structured_data: Dict):
+        # Write then rename, so concurrent readers never see a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            data = orjson.dumps(structured_data, option=orjson.OPT_NON_STR_KEYS)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not cache extraction at {cache_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    async def extract_from_pdfs(
+        self,
+        file_paths: List[str],
+        max_concurrency: Optional[int] = None,
+        file_hashes: Optional[List[Optional[str]]] = None,
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Extract several PDFs concurrently.
+
+        At most `max_concurrency` (default settings.llama_extract_concurrency)
+        extractions are in flight at once, to stay under LlamaCloud's rate
+        limits. `file_hashes`, when given, holds each path's SHA-256 (or
+        None) for extract_from_pdf. Returns one entry per path, in order: the extract_from_pdf
+        result, or the exception it raised.
+        """
+        semaphore = asyncio.Semaphore(
+            max_concurrency or settings.llama_extract_concurrency
+        )
+
+        async def _extract(file_path: str, file_hash: Optional[str]) -> Dict:
+            async with semaphore:
+                return await self.extract_from_pdf(file_path, file_hash)
+
+        if file_hashes is None:
+            file_hashes = [None] * len(file_paths)
+        return await asyncio.gather(
+            *(
+                _extract(file_path, file_hash)
+                for file_path, file_hash in zip(file_paths, file_hashes)
+            ),
+            return_exceptions=True,
+        )
+
     def _convert_to_markdown(self, structured_data: Dict) -> str:
         """Convert structured JSON data to markdown for backward compatibility."""
         if not isinstance(structured_data, dict):
             return str(structured_data)
-        
-        lines = []
-        
-        # Header
-        header = structured_data.get("header", {})
-        if header:
-            lines.append(f"# {header.get('course_code', '')} - {header.get('course_name', '')}")
-            lines.append(f"**Semester:** {header.get('semester', '')}")
-            lines.append(f"**Exam Date:** {header.get('exam_date_month', '')}")
-            lines.append(f"**Max Marks:** {header.get('max_marks', '')}")
-            lines.append(f"**Duration:** {header.get('duration', '')}")
-            lines.append("")
-        
-        # Part A
-        part_a = structured_data.get("part_a", {})
-        if part_a:
-            lines.append("# PART - A")
-            if part_a.get("instructions"):
-                lines.append(part_a["instructions"])
-            lines.append("")
-            
-            for q in part_a.get("questions", []):
-                q_num = q.get("question_number", "?")
-                lines.append(f"**{q_num}.** {q.get('question_text', '')}")
-                options = q.get("options", {})
-                for opt_key in ["A", "B", "C", "D"]:
-                    if opt_key in options:
-                        lines.append(f"   {opt_key}) {options[opt_key]}")
-                lines.append("")
-        
-        # Part B
-        part_b = structured_data.get("part_b", {})
-        if part_b:
-            lines.append("# PART - B")
-            if part_b.get("instructions"):
-                lines.append(part_b["instructions"])
-            lines.append("")
-            
-            for q in part_b.get("questions", []):
-                q_num = q.get("question_number", "?")
-                lines.append(f"# {q_num}")
-                for sub_q in q.get("sub_questions", []):
-                    label = sub_q.get("label", "")
-                    text = sub_q.get("text", "")
-                    is_alt = sub_q.get("is_alternative", False)
-                    if is_alt:
-                        lines.append("(OR)")
-                    lines.append(f"{label}. {text}")
-                lines.append("")
-        
-        # Part C
-        part_c = structured_data.get("part_c", {})
-        if part_c:
-            lines.append("# PART - C")
-            if part_c.get("instructions"):
-                lines.append(part_c["instructions"])
-            lines.append("")
-            
-            for q in part_c.get("questions", []):
-                q_num = q.get("question_number", "?")
-                lines.append(f"# {q_num}")
-                lines.append(q.get("question_text", ""))
-                lines.append("")
-        
-        return "\n".join(lines)
+
+        return "\n".join(itertools.chain(
+            self._header_md(structured_data.get("header", {})),
+            self._part_a_md(structured_data.get("part_a", {})),
+            self._part_b_md(structured_data.get("part_b", {})),
+            self._part_c_md(structured_data.get("part_c", {})),
+        ))
+
+    @staticmethod
+    def _header_md(header: Dict) -> Iterator[str]:
+        if not header:
+            return
+        get = header.get
+        yield (
+            f"# {get('course_code', '')} - {get('course_name', '')}\n"
+            f"**Semester:** {get('semester', '')}\n"
+            f"**Exam Date:** {get('exam_date_month', '')}\n"
+            f"**Max Marks:** {get('max_marks', '')}\n"
+            f"**Duration:** {get('duration', '')}\n"
+        )
+
+    @staticmethod
+    def _part_md(title: str, part: Dict) -> Iterator[str]:
+        """Heading and instructions shared by every part."""
+        yield f"# {title}"
+        if part.get("instructions"):
+            yield part["instructions"]
+        yield ""
+
+    def _part_a_md(self, part_a: Dict) -> Iterator[str]:
+        if not part_a:
+            return
+        yield from self._part_md("PART - A", part_a)
+
+        for q in part_a.get("questions", ()):
+            q_get = q.get
+            yield f"**{q_get('question_number', '?')}.** {q_get('question_text', '')}"
+            options = q_get("options") or {}
+            for opt_key in "ABCD":
+                value = options.get(opt_key)
+                if value is not None:
+                    yield f"   {opt_key}) {value}"
+            yield ""
+
+    def _part_b_md(self, part_b: Dict) -> Iterator[str]:
+        if not part_b:
+            return
+        yield from self._part_md("PART - B", part_b)
+
+        for q in part_b.get("questions", ()):
+            yield f"# {q.get('question_number', '?')}"
+            for sub_q in q.get("sub_questions", ()):
+                if sub_q.get("is_alternative", False):
+                    yield "(OR)"
+                yield f"{sub_q.get('label', '')}. {sub_q.get('text', '')}"
+            yield ""
+
+    def _part_c_md(self, part_c: Dict) -> Iterator[str]:
+        if not part_c:
+            return
+        yield from self._part_md("PART - C", part_c)
+
+        for q in part_c.get("questions", ()):
+            yield f"# {q.get('question_number', '?')}"
+            yield q.get("question_text", "")
+            yield ""
 
     def _map_question_to_unit(self, question_number: str, part: str) -> Optional[int]:
         """
@@ -170,26 +313,24 @@ class LlamaCloudService:
         
         Part C: Random (return None)
         """
-        try:
-            import re
-            # Extract base question number
-            base_num = int(re.match(r'(\d+)', str(question_number)).group(1))
-            
-            if part == "A":
-                # MCQs: 1-20
-                unit = ((base_num - 1) // 4) + 1
-                return min(unit, 5)
-            elif part == "B":
-                # Descriptive: 21-25
-                unit = base_num - 20
-                return min(max(unit, 1), 5)
-            else:
-                # Part C: Random/unknown
-                return None
-        except Exception as e:
-            logger.warning(f"Could not map question {question_number} to unit: {e}")
+        if part not in ("A", "B"):
+            # Part C: Random/unknown
             return None
 
+        # Extract base question number
+        base_num = _leading_int(question_number)
+        if base_num is None:
+            logger.warning(f"Could not map question {question_number} to unit")
+            return None
+
+        if part == "A":
+            # MCQs: 1-20, anything later counts as unit 5
+            return _PART_A_UNITS[min(base_num, 20)]
+        # Descriptive: 21-25, clamped to units 1-5
+        if 21 <= base_num <= 25:
+            return _PART_B_UNITS[base_num - 21]
+        return 1 if base_num < 21 else 5
+
     async def extract_exam_metadata(self, text: str) -> ExamPaperMetadata:
         """Extract exam paper metadata from structured data or text."""
         # If we have structured_data in the extraction result, use it
@@ -201,60 +342,39 @@ class LlamaCloudService:
         logger.info("Metadata extraction handled by structured extraction")
         return metadata
 
-    async def extract_questions_by_parts(self, text: str, structured_data: Optional[Dict] = None) -> Dict[str, List[Dict]]:
-        """
-        Extract questions organized by parts using structured data from LlamaExtract.
-        
-        Args:
-            text: Markdown text (for backward compatibility)
-            structured_data: Structured JSON from LlamaExtract
-        
-        Returns: {
-            "A": [...],  # MCQs
-            "B": [...],  # Descriptive
-            "C": [...]   # Scenario
-        }
-        """
-        result = {"A": [], "B": [], "C": []}
-        
-        if not structured_data or not isinstance(structured_data, dict):
-            logger.warning("No structured data provided, cannot extract questions")
-            return result
-        
+    def _iter_questions(self, structured_data: Dict) -> Iterator[Dict]:
+        """Yield question dicts from LlamaExtract's structured data: Part A, then B, then C."""
+        map_unit = self._map_question_to_unit
+
         # Extract Part A (MCQs)
         part_a = structured_data.get("part_a", {})
-        for q in part_a.get("questions", []):
+        for q in part_a.get("questions", ()):
             q_num = str(q.get("question_number", ""))
-            unit = self._map_question_to_unit(q_num, "A")
-            
-            result["A"].append({
+            yield {
                 "content": q.get("question_text", ""),
                 "question_number": q_num,
                 "part": "A",
                 "part_marks": 1,  # Part A is always 1 mark
-                "unit": unit,
+                "unit": map_unit(q_num, "A"),
                 "is_mcq": True,
                 "options": q.get("options", {}),
                 "marks": 1,
                 "question_type": "mcq",
                 "is_mandatory": True,
                 "has_or_option": False,
-            })
-        
+            }
+
         # Extract Part B (Descriptive)
         part_b = structured_data.get("part_b", {})
-        for q in part_b.get("questions", []):
-            q_num = q.get("question_number", "")
-            unit = self._map_question_to_unit(str(q_num), "B")
-            
-            for sub_q in q.get("sub_questions", []):
-                label = sub_q.get("label", "")
-                full_q_num = f"{q_num}.{label}"
-                is_alt = sub_q.get("is_alternative", False)
-                
-                result["B"].append({
+        for q in part_b.get("questions", ()):
+            q_num = str(q.get("question_number", ""))
+            unit = map_unit(q_num, "B")
+            prefix = q_num + "."
+
+            for sub_q in q.get("sub_questions", ()):
+                yield {
                     "content": sub_q.get("text", ""),
-                    "question_number": full_q_num,
+                    "question_number": prefix + str(sub_q.get("label", "")),
                     "part": "B",
                     "part_marks": 8,  # Part B is usually 8 marks
                     "unit": unit,
@@ -262,17 +382,15 @@ class LlamaCloudService:
                     "marks": 8,
                     "question_type": "descriptive",
                     "is_mandatory": True,
-                    "has_or_option": is_alt,
-                })
-        
+                    "has_or_option": sub_q.get("is_alternative", False),
+                }
+
         # Extract Part C (Scenario)
         part_c = structured_data.get("part_c", {})
-        for q in part_c.get("questions", []):
-            q_num = str(q.get("question_number", ""))
-            
-            result["C"].append({
+        for q in part_c.get("questions", ()):
+            yield {
                 "content": q.get("question_text", ""),
-                "question_number": q_num,
+                "question_number": str(q.get("question_number", "")),
                 "part": "C",
                 "part_marks": 15,  # Part C is usually 15 marks
                 "unit": None,  # Part C can be from any unit
@@ -281,7 +399,30 @@ class LlamaCloudService:
                 "question_type": "descriptive",
                 "is_mandatory": False,  # Part C is "ANY ONE"
                 "has_or_option": False,
-            })
+            }
+
+    async def extract_questions_by_parts(self, text: str, structured_data: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """
+        Extract questions organized by parts using structured data from LlamaExtract.
+        
+        Args:
+            text: Markdown text (for backward compatibility)
+            structured_data: Structured JSON from LlamaExtract
+        
+        Returns: {
+            "A": [...],  # MCQs
+            "B": [...],  # Descriptive
+            "C": [...]   # Scenario
+        }
+        """
+        result = {"A": [], "B": [], "C": []}
+        
+        if not structured_data or not isinstance(structured_data, dict):
+            logger.warning("No structured data provided, cannot extract questions")
+            return result
+
+        for question in self._iter_questions(structured_data):
+            result[question["part"]].append(question)
         
         total_questions = sum(len(questions) for questions in result.values())
         logger.info(f"Extracted {total_questions} questions from structured data: A={len(result['A'])}, B={len(result['B'])}, C={len(result['C'])}")
@@ -291,16 +432,14 @@ class LlamaCloudService:
     async def extract_questions_from_text(self, text: str, structured_data: Optional[Dict] = None) -> List[Dict]:
         """
         Legacy method - parse questions from text or structured data.
+
+        Returns all questions in part order (A, B, C).
         """
-        # Use the new part-based extraction
-        parts = await self.extract_questions_by_parts(text, structured_data)
-        
-        # Combine all parts
-        all_questions = []
-        for part_questions in parts.values():
-            all_questions.extend(part_questions)
-        
-        return all_questions
+        if not structured_data or not isinstance(structured_data, dict):
+            logger.warning("No structured data provided, cannot extract questions")
+            return []
+
+        return list(self._iter_questions(structured_data))
 
 
 llama_service = LlamaCloudService()
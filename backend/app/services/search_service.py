@@ -1,41 +1,162 @@
 from app.services.embedding_service import embedding_service
-from app.core.qdrant import qdrant_service
+from app.core.qdrant import get_qdrant_service
+from app.core.semantic_cache import semantic_cache
 from app.core.database import async_session
 from app.models import Question
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, any_, func, text, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Payload keys (besides question_id/text) that make up a search result
+RESULT_PAYLOAD_FIELDS = (
+    "subject",
+    "topic",
+    "difficulty",
+    "question_type",
+    "year",
+    "marks",
+    "page_number",
+)
+
+# Questions by id, in the order of the ids array. One statement shape for
+# any number of hits, built once so it stays in the compiled cache.
+_QUESTION_IDS = bindparam("ids", type_=ARRAY(Uuid(as_uuid=False)))
+_QUESTIONS_BY_IDS_STMT = (
+    select(Question)
+    .where(Question.id == any_(_QUESTION_IDS))
+    .order_by(func.array_position(_QUESTION_IDS, Question.id))
+)
+
+
+class QdrantSearchBatcher:
+    """
+    Micro-batches concurrent Qdrant searches.
+
+    Searches submitted within `window` seconds of each other are sent as a
+    single query_batch_points request per (limit, filters, hnsw_ef)
+    combination.
+    """
+
+    def __init__(self, window: float = 0.005, max_batch: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[
+            Tuple[np.ndarray, int, Optional[Dict], Optional[int], asyncio.Future]
+        ] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+
+    async def search(
+        self,
+        query_vector: np.ndarray,
+        limit: int = 10,
+        filters: Optional[Dict] = None,
+        hnsw_ef: Optional[int] = None
+    ) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query_vector, limit, filters, hnsw_ef, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.window, self._schedule_flush, loop
+            )
+
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        if pending:
+            # Keep a reference so the task isn't garbage-collected mid-flight
+            task = loop.create_task(self._flush(pending))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending):
+        groups: Dict[Tuple, List] = {}
+        for item in pending:
+            _, limit, filters, hnsw_ef, _ = item
+            key = (limit, tuple(sorted((filters or {}).items())), hnsw_ef)
+            groups.setdefault(key, []).append(item)
+
+        for items in groups.values():
+            _, limit, filters, hnsw_ef, _ = items[0]
+            try:
+                results = await get_qdrant_service().search_batch(
+                    [vector for vector, _, _, _, _ in items],
+                    limit=limit,
+                    filters=filters,
+                    hnsw_ef=hnsw_ef,
+                )
+            except Exception as e:
+                for *_, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (*_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+search_batcher = QdrantSearchBatcher()
+
 
 class SearchService:
     async def semantic_search(
         self,
         query: str,
         limit: int = 10,
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        hnsw_ef: Optional[int] = None
     ) -> Dict:
         """
         Semantic search for questions.
 
+        `hnsw_ef` overrides Qdrant's HNSW beam width for this search.
+
         1. Generate embedding for query
-        2. Search Qdrant for similar vectors
-        3. Fetch full details from PostgreSQL
+        2. Search Qdrant for similar vectors (unless the semantic cache
+           already holds results for a near-identical query)
+        3. Build results from the Qdrant payload (PostgreSQL only for
+           points indexed without the full payload)
         4. Return results
         """
         try:
             logger.info(f"Searching for: {query}")
 
-            # Generate query embedding
-            query_embedding = embedding_service.generate_embedding(query)
+            # Generate query embedding (cached, batched, off the event loop)
+            query_embedding = await embedding_service.embed(query)
 
-            # Search in Qdrant
-            qdrant_results = await qdrant_service.search(
-                query_vector=query_embedding,
-                limit=limit,
-                filters=filters
+            # Near-duplicate queries reuse earlier hits
+            cache_namespace = (
+                get_qdrant_service().collection_name,
+                limit,
+                tuple(sorted((filters or {}).items())),
+                hnsw_ef,
             )
+            qdrant_results = semantic_cache.lookup(query_embedding, cache_namespace)
+
+            if qdrant_results is None:
+                # Search in Qdrant (batched with concurrent searches)
+                qdrant_results = await search_batcher.search(
+                    query_vector=query_embedding,
+                    limit=limit,
+                    filters=filters,
+                    hnsw_ef=hnsw_ef,
+                )
+                semantic_cache.store(query_embedding, cache_namespace, qdrant_results)
 
             if not qdrant_results:
                 return {
@@ -45,43 +166,9 @@ class SearchService:
                     "took_ms": 0
                 }
 
-            # Fetch full question details from PostgreSQL
-            async with async_session() as session:
-                question_ids = [r["payload"]["question_id"] for r in qdrant_results if r["payload"].get("question_id")]
-                
-                if not question_ids:
-                    return {
-                        "query": query,
-                        "results": [],
-                        "total": 0,
-                    }
-                
-                stmt = select(Question).where(Question.id.in_(question_ids))
-                db_result = await session.execute(stmt)
-                questions_map = {q.id: q for q in db_result.scalars().all()}
-
-            # Combine results
-            results = []
-            for qdrant_result in qdrant_results:
-                q_id = qdrant_result["payload"].get("question_id")
-                if not q_id:
-                    continue
-                    
-                question = questions_map.get(q_id)
-
-                if question:
-                    results.append({
-                        "id": question.id,
-                        "content": question.content,
-                        "score": qdrant_result["score"],
-                        "subject": question.subject,
-                        "topic": question.topic,
-                        "difficulty": question.difficulty,
-                        "question_type": question.question_type,
-                        "year": question.year,
-                        "marks": question.marks,
-                        "page_number": question.page_number,
-                    })
+            results = self._results_from_payload(qdrant_results)
+            if results is None:
+                results = await self._results_from_db(qdrant_results)
 
             return {
                 "query": query,
@@ -93,5 +180,69 @@ class SearchService:
             logger.error(f"Search failed: {e}")
             raise
 
+    def _results_from_payload(self, qdrant_results: List[Dict]) -> Optional[List[Dict]]:
+        """
+        Build results straight from the Qdrant payload.
+
+        Returns None if any hit lacks part of the payload, so the caller can
+        fall back to PostgreSQL.
+        """
+        results = []
+        for r in qdrant_results:
+            payload = r["payload"]
+            q_id = payload.get("question_id")
+            if not q_id:
+                continue
+            if "text" not in payload or not all(
+                field in payload for field in RESULT_PAYLOAD_FIELDS
+            ):
+                return None
+
+            result = {"id": q_id, "content": payload["text"], "score": r["score"]}
+            for field in RESULT_PAYLOAD_FIELDS:
+                result[field] = payload[field]
+            results.append(result)
+
+        return results
+
+    async def _results_from_db(self, qdrant_results: List[Dict]) -> List[Dict]:
+        """Fetch full question details from PostgreSQL, keeping Qdrant's order."""
+        scores = {}
+        for r in qdrant_results:
+            q_id = r["payload"].get("question_id")
+            if q_id:
+                scores.setdefault(q_id, r["score"])
+        question_ids = list(scores)
+
+        if not question_ids:
+            return []
+
+        async with async_session() as session:
+            # Keep the planner on the primary key index; a bitmap heap scan
+            # would only add a re-sort for a handful of ids.
+            await session.execute(text("SET LOCAL enable_bitmapscan = off"))
+
+            # Rows come back in Qdrant's ranking order
+            db_result = await session.execute(
+                _QUESTIONS_BY_IDS_STMT, {"ids": question_ids}
+            )
+            questions = db_result.scalars().all()
+
+        return [
+            {
+                "id": question.id,
+                "content": question.content,
+                "score": scores[question.id],
+                "subject": question.subject,
+                "topic": question.topic,
+                "difficulty": question.difficulty,
+                "question_type": question.question_type,
+                "year": question.year,
+                "marks": question.marks,
+                "page_number": question.page_number,
+            }
+            for question in questions
+        ]
+
 
 search_service = SearchService()
@@ -1,16 +1,23 @@
 from app.tasks.celery_app import celery_app
+from celery.signals import worker_process_init, worker_process_shutdown
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
-from app.models import Job, JobStatus, Document, Question
+from app.core.database import connect_args
+from app.models import Job, JobStatus, Document, Question, JobDocument
 from app.services.llama_service import llama_service
 from app.services.embedding_service import embedding_service
-from app.core.qdrant import qdrant_service
+from app.core.qdrant import get_qdrant_service
+from datetime import datetime
+import asyncio
 import logging
 import hashlib
+import orjson
 import os
 import shutil
-from sqlalchemy import select, update
+import uuid
+from typing import Optional, Tuple
+from sqlalchemy import func, insert, select, update
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +26,63 @@ PERMANENT_STORAGE_DIR = settings.permanent_storage_dir
 os.makedirs(PERMANENT_STORAGE_DIR, exist_ok=True)
 
 
+# One event loop and engine per worker process. asyncpg connections belong
+# to the loop that opened them, so tasks run on this loop to reuse the pool.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_engine = None
+_worker_session_maker = None
+
+
+def _get_worker_database() -> Tuple[asyncio.AbstractEventLoop, sessionmaker]:
+    """Create this process's loop, engine and session factory on first use."""
+    global _worker_loop, _worker_engine, _worker_session_maker
+    if _worker_session_maker is None:
+        _worker_loop = asyncio.new_event_loop()
+        _worker_engine = create_async_engine(
+            settings.database_url,
+            echo=False,
+            future=True,
+            # Connections sit idle between tasks
+            pool_pre_ping=True,
+            # A worker process runs one task at a time
+            pool_size=5,
+            max_overflow=10,
+            # Larger batches for executemany-style INSERT/UPDATE statements
+            insertmanyvalues_page_size=1000,
+            connect_args=connect_args,
+        )
+        _worker_session_maker = sessionmaker(
+            _worker_engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _worker_loop, _worker_session_maker
+
+
+@worker_process_init.connect
+def init_worker_database(**kwargs):
+    """Build the engine after the fork, so no pooled connection is shared."""
+    _get_worker_database()
+
+
+@worker_process_shutdown.connect
+def dispose_worker_database(**kwargs):
+    if _worker_engine is not None:
+        _worker_loop.run_until_complete(_worker_engine.dispose())
+        _worker_loop.close()
+
+
+@worker_process_init.connect
+def preload_embedding_model(**kwargs):
+    """Load the embedding model in each worker process before its first task."""
+    if settings.preload_embedding_model:
+        embedding_service.preload()
+
+
 @celery_app.task(bind=True, max_retries=3, name="process_pdf_task")
-def process_pdf_task(self, job_id: str, file_paths: list):
+def process_pdf_task(self, job_id: str, file_paths: list, file_hashes: list = None):
     """
     Process PDF files:
     1. Update job status to processing
@@ -31,56 +93,19 @@ def process_pdf_task(self, job_id: str, file_paths: list):
     6. Index in Qdrant
     7. Update job status to completed
     """
-    import asyncio
-
-    # Create a new engine for this task to avoid event loop issues with asyncpg
-    engine = create_async_engine(
-        settings.database_url,
-        echo=False,
-        future=True,
-        pool_pre_ping=True,
-        # Use NullPool to avoid keeping connections open in Celery workers
-        # poolclass=NullPool
-    )
-
-    # Create a local session factory
-    task_session_maker = sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autocommit=False,
-        autoflush=False,
-    )
-
-    async def _run_task():
-        try:
-            await _process_pdf_async(job_id, file_paths, task_session_maker)
-        finally:
-            await engine.dispose()
+    loop, session_maker = _get_worker_database()
 
     try:
-        # Run async function
-        asyncio.run(_run_task())
+        loop.run_until_complete(
+            _process_pdf_async(job_id, file_paths, session_maker, file_hashes)
+        )
         return {"status": "completed", "job_id": job_id}
 
     except Exception as exc:
         logger.error(f"PDF processing failed for job {job_id}: {exc}")
 
-        # Update job with error using a fresh engine/loop context
-        # We need to recreate the engine/session for the error handler if the main block failed
-        # But simpler is to run it in a new loop if needed, or re-use logic
-        # For simplicity, we'll try to run the error handler in a fresh run
-        async def _run_error_handler():
-            err_engine = create_async_engine(settings.database_url)
-            err_session = sessionmaker(
-                err_engine, class_=AsyncSession, expire_on_commit=False
-            )
-            try:
-                await _mark_job_failed(job_id, str(exc), err_session)
-            finally:
-                await err_engine.dispose()
-
-        asyncio.run(_run_error_handler())
+        # Update job with error
+        loop.run_until_complete(_mark_job_failed(job_id, str(exc), session_maker))
 
         # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=60 * (2**self.request.retries))
@@ -97,7 +122,9 @@ async def _mark_job_failed(job_id: str, error_message: str, session_maker):
         await session.commit()
 
 
-async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
+async def _process_pdf_async(
+    job_id: str, file_paths: list, session_maker, file_hashes: list = None
+):
     """Async helper for PDF processing."""
     async with session_maker() as session:
         try:
@@ -113,28 +140,83 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
 
             total_questions = 0
             total_pages = 0
-            all_questions_for_indexing = []
+            # (questions, embedding task) per stored file, in file order
+            indexing_batches = []
+
+            # Hashes come from the upload; compute them here otherwise, since
+            # the duplicate check below needs them before any extraction
+            if not file_hashes:
+                hashes = await asyncio.gather(
+                    *(asyncio.to_thread(_calculate_file_hash, path) for path in file_paths),
+                    return_exceptions=True,
+                )
+                # A file that can't be hashed fails again (and is skipped) below
+                file_hashes = [h if isinstance(h, str) else None for h in hashes]
+
+            # Files ingested by an earlier job are already stored, extracted
+            # and indexed; link their document to this job and count them
+            # without redoing any of that work
+            ingested = await _find_ingested_documents(
+                session, [h for h in file_hashes if h]
+            )
+            new_files = []
+            linked_document_ids = set()
+            for idx, (file_path, file_hash) in enumerate(zip(file_paths, file_hashes)):
+                if file_hash in ingested:
+                    document_id, document_job_id, page_count, question_count = ingested[
+                        file_hash
+                    ]
+                    total_pages += page_count or 0
+                    total_questions += question_count
+                    # A retry finds this job's own documents; nothing to link
+                    if document_job_id != job_id:
+                        linked_document_ids.add(document_id)
+                    logger.info(f"Skipping {file_path}: already ingested ({file_hash})")
+                else:
+                    new_files.append((idx, file_path, file_hash))
+
+            if linked_document_ids:
+                await session.execute(
+                    insert(JobDocument),
+                    [
+                        {"job_id": job_id, "document_id": document_id}
+                        for document_id in linked_document_ids
+                    ],
+                )
+                await session.commit()
+
+            # Extract all PDFs up front so the LlamaExtract calls overlap, and
+            # store the files in worker threads while they run
+            logger.info(f"Extracting text from {len(new_files)} files...")
+            extraction_results, stored_files = await asyncio.gather(
+                llama_service.extract_from_pdfs(
+                    [path for _, path, _ in new_files],
+                    file_hashes=[file_hash for _, _, file_hash in new_files],
+                ),
+                asyncio.gather(
+                    *(
+                        asyncio.to_thread(_hash_and_store, file_path, file_hash)
+                        for _, file_path, file_hash in new_files
+                    ),
+                    return_exceptions=True,
+                ),
+            )
 
             # Process each PDF file
-            for idx, file_path in enumerate(file_paths):
+            for n, (idx, file_path, _) in enumerate(new_files):
+                embedding_task = None
                 try:
                     logger.info(
                         f"Processing file {idx + 1}/{len(file_paths)}: {file_path}"
                     )
 
-                    # Calculate file hash
-                    file_hash = _calculate_file_hash(file_path)
+                    # Copied to permanent storage during extraction
+                    stored = stored_files[n]
+                    if isinstance(stored, Exception):
+                        raise stored
+                    file_hash, permanent_file_path = stored
                     filename = os.path.basename(file_path)
 
-                    # Copy to permanent storage
-                    permanent_file_path = os.path.join(
-                        PERMANENT_STORAGE_DIR, f"{file_hash}_{filename}"
-                    )
-                    shutil.copy2(file_path, permanent_file_path)
-                    logger.info(
-                        f"Copied file to permanent storage: {permanent_file_path}"
-                    )
-
                     # Create document record
                     document = Document(
                         job_id=job_id,
@@ -145,9 +227,10 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
                     session.add(document)
                     await session.flush()  # Get document ID
 
-                    # Extract text from PDF using LlamaExtract
-                    logger.info(f"Extracting text from {filename}...")
-                    extraction_result = await llama_service.extract_from_pdf(file_path)
+                    # Text extracted from the PDF by LlamaExtract
+                    extraction_result = extraction_results[n]
+                    if isinstance(extraction_result, Exception):
+                        raise extraction_result
 
                     extracted_text = extraction_result.get("text", "")
                     pages = extraction_result.get("pages", [])
@@ -192,65 +275,79 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
 
                     # Parse questions from structured data
                     logger.info(f"Parsing questions from {filename}...")
-                    questions_by_parts = await llama_service.extract_questions_by_parts(
+                    # All parts, in order, as one flat list
+                    questions_data = await llama_service.extract_questions_from_text(
                         extracted_text, structured_data=structured_data
                     )
 
-                    # Flatten all questions from all parts
-                    questions_data = []
-                    for part_questions in questions_by_parts.values():
-                        questions_data.extend(part_questions)
-
                     logger.info(f"Found {len(questions_data)} questions in {filename}")
 
-                    # Store questions in database
+                    # Store questions in database with a single COPY
+                    question_rows = []
+                    questions_for_indexing = []
                     for q_data in questions_data:
-                        question = Question(
-                            document_id=document.id,
-                            content=q_data["content"],
-                            # Part information
-                            part=q_data.get("part"),
-                            part_marks=q_data.get("part_marks"),
-                            question_number=q_data.get("question_number"),
-                            unit=q_data.get("unit"),
-                            # MCQ fields
-                            is_mcq=1 if q_data.get("is_mcq") else 0,
-                            options=q_data.get("options"),
-                            correct_answer=q_data.get("correct_answer"),
-                            # Metadata
-                            subject=q_data.get("subject"),
-                            topic=q_data.get("topic"),
-                            difficulty=q_data.get("difficulty"),
-                            question_type=q_data.get("question_type"),
-                            year=q_data.get("year"),
-                            marks=q_data.get("marks"),
-                            # Additional flags
-                            is_mandatory=1 if q_data.get("is_mandatory", True) else 0,
-                            has_or_option=1
-                            if q_data.get("has_or_option", False)
-                            else 0,
+                        question_id = str(uuid.uuid4())
+                        question_rows.append(
+                            (
+                                question_id,
+                                document.id,
+                                q_data["content"],
+                                # Part information
+                                q_data.get("part"),
+                                q_data.get("part_marks"),
+                                q_data.get("question_number"),
+                                q_data.get("unit"),
+                                # MCQ fields
+                                1 if q_data.get("is_mcq") else 0,
+                                orjson.dumps(
+                                    q_data["options"], option=orjson.OPT_NON_STR_KEYS
+                                ).decode()
+                                if q_data.get("options") is not None
+                                else None,
+                                q_data.get("correct_answer"),
+                                # Metadata
+                                q_data.get("subject"),
+                                q_data.get("topic"),
+                                q_data.get("difficulty"),
+                                q_data.get("question_type"),
+                                q_data.get("year"),
+                                q_data.get("marks"),
+                                # Additional flags
+                                1 if q_data.get("is_mandatory", True) else 0,
+                                1 if q_data.get("has_or_option", False) else 0,
+                                datetime.utcnow(),
+                            )
                         )
-                        session.add(question)
-                        await session.flush()  # Get question ID
 
                         # Prepare for embedding and indexing
-                        all_questions_for_indexing.append(
+                        questions_for_indexing.append(
                             {
-                                "id": question.id,
-                                "content": question.content,
+                                "id": question_id,
+                                "content": q_data["content"],
                                 "document_id": document.id,
-                                "part": question.part,
-                                "subject": question.subject,
-                                "topic": question.topic,
-                                "difficulty": question.difficulty,
-                                "question_type": question.question_type,
-                                "year": question.year,
-                                "marks": question.marks,
+                                "part": q_data.get("part"),
+                                "subject": q_data.get("subject"),
+                                "topic": q_data.get("topic"),
+                                "difficulty": q_data.get("difficulty"),
+                                "question_type": q_data.get("question_type"),
+                                "year": q_data.get("year"),
+                                "marks": q_data.get("marks"),
                             }
                         )
 
+                    # Embed this file's questions while its rows are written
+                    embedding_task = asyncio.create_task(
+                        embedding_service.batch_generate(
+                            [q["content"] for q in questions_for_indexing]
+                        )
+                    )
+
+                    await _copy_questions(session, question_rows)
+
                     total_questions += len(questions_data)
                     await session.commit()
+                    indexing_batches.append((questions_for_indexing, embedding_task))
+                    embedding_task = None  # Owned by indexing_batches now
 
                     # Update progress
                     progress = 40 + (idx * 30 // len(file_paths))
@@ -263,9 +360,19 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
 
                 except Exception as e:
                     logger.error(f"Error processing file {file_path}: {e}")
+                    # This file's questions won't be indexed
+                    if embedding_task is not None:
+                        embedding_task.cancel()
+                    # Discard the failed transaction so later files and the
+                    # job status update can still use the session
+                    await session.rollback()
                     # Continue with other files
                     continue
 
+            all_questions_for_indexing = [
+                q for questions, _ in indexing_batches for q in questions
+            ]
+
             # Generate embeddings and index in Qdrant
             if all_questions_for_indexing:
                 logger.info(
@@ -278,16 +385,14 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
                 )
                 await session.commit()
 
-                # Generate embeddings in batch
-                texts = [q["content"] for q in all_questions_for_indexing]
-                embeddings = await embedding_service.batch_generate(texts)
-
-                # Prepare data for Qdrant
-                qdrant_points = []
-                for i, (q, embedding) in enumerate(
-                    zip(all_questions_for_indexing, embeddings)
-                ):
-                    qdrant_points.append(
+                # Upload each file's points while the next file's embeddings
+                # finish
+                qdrant_service = get_qdrant_service()
+                indexed_count = 0
+                upload_task = None
+                for questions, task in indexing_batches:
+                    embeddings = await task
+                    qdrant_points = [
                         {
                             "question_id": q["id"],
                             "vector": embedding,
@@ -300,20 +405,28 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
                             "year": q["year"],
                             "marks": q["marks"],
                         }
+                        for q, embedding in zip(questions, embeddings)
+                    ]
+
+                    if upload_task is not None:
+                        indexed_count += await upload_task
+                    logger.info(f"Indexing {len(qdrant_points)} questions in Qdrant...")
+                    upload_task = asyncio.create_task(
+                        qdrant_service.index_questions(qdrant_points)
                     )
 
-                # Index in Qdrant
-                logger.info(f"Indexing {len(qdrant_points)} questions in Qdrant...")
-                indexed_count = await qdrant_service.index_questions(qdrant_points)
+                if upload_task is not None:
+                    indexed_count += await upload_task
                 logger.info(f"Successfully indexed {indexed_count} questions")
 
-                # Update qdrant_id in database
-                for i, q in enumerate(all_questions_for_indexing):
-                    await session.execute(
-                        update(Question)
-                        .where(Question.id == q["id"])
-                        .values(qdrant_id=i)
-                    )
+                # Record the point ids (one executemany by primary key)
+                await session.execute(
+                    update(Question),
+                    [
+                        {"id": q["id"], "qdrant_id": q["id"]}
+                        for q in all_questions_for_indexing
+                    ],
+                )
                 await session.commit()
 
             # Mark job as completed
@@ -353,10 +466,140 @@ async def _process_pdf_async(job_id: str, file_paths: list, session_maker):
             raise
 
 
+async def _find_ingested_documents(session: AsyncSession, file_hashes: list) -> dict:
+    """
+    Map each already-ingested file hash to (document_id, job_id, page_count,
+    question_count).
+
+    A file counts as ingested once its questions are indexed in Qdrant
+    (qdrant_id is set), not merely stored, so a run that failed before
+    indexing doesn't make the file skip forever.
+    """
+    if not file_hashes:
+        return {}
+
+    result = await session.execute(
+        select(
+            Document.file_hash,
+            Document.id,
+            Document.job_id,
+            Document.page_count,
+            func.count(Question.id),
+        )
+        .join(Question, Question.document_id == Document.id)
+        .where(
+            Document.file_hash.in_(set(file_hashes)),
+            Question.qdrant_id.isnot(None),
+        )
+        .group_by(Document.id)
+    )
+    return {
+        file_hash: (document_id, document_job_id, page_count, question_count)
+        for file_hash, document_id, document_job_id, page_count, question_count in result
+    }
+
+
+# Column order for the tuples passed to _copy_questions
+QUESTION_COPY_COLUMNS = (
+    "id",
+    "document_id",
+    "content",
+    "part",
+    "part_marks",
+    "question_number",
+    "unit",
+    "is_mcq",
+    "options",
+    "correct_answer",
+    "subject",
+    "topic",
+    "difficulty",
+    "question_type",
+    "year",
+    "marks",
+    "is_mandatory",
+    "has_or_option",
+    "created_at",
+)
+
+
+async def _copy_questions(session: AsyncSession, rows: list) -> None:
+    """
+    Bulk load question rows with PostgreSQL COPY.
+
+    Runs on the session's own connection so the rows join its transaction.
+    JSON columns must already be serialized to text.
+    """
+    if not rows:
+        return
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        Question.__tablename__, records=rows, columns=QUESTION_COPY_COLUMNS
+    )
+
+
+def _hash_and_store(file_path: str, file_hash: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Copy an uploaded PDF into permanent storage, named by its content hash.
+
+    Uses the hash computed during upload when given. Returns the hash and
+    the permanent path.
+    """
+    if file_hash is None:
+        file_hash = _calculate_file_hash(file_path)
+
+    permanent_file_path = os.path.join(
+        PERMANENT_STORAGE_DIR, f"{file_hash}_{os.path.basename(file_path)}"
+    )
+    _store_file(file_path, permanent_file_path)
+    logger.info(f"Copied file to permanent storage: {permanent_file_path}")
+    return file_hash, permanent_file_path
+
+
+# ioctl(FICLONE): copy-on-write clone on btrfs/XFS (Linux)
+FICLONE = 0x40049409
+
+
+def _store_file(src: str, dst: str) -> None:
+    """
+    Put a copy of src at dst without moving bytes where the filesystem allows.
+
+    Tries a hard link, then a reflink clone, then a plain copy (which CPython
+    does with copy_file_range/sendfile on Linux). dst is named by content
+    hash, so an existing dst already holds the same bytes.
+    """
+    try:
+        os.link(src, dst)
+        return
+    except FileExistsError:
+        return
+    except OSError:
+        pass
+
+    try:
+        import fcntl
+
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+
+    shutil.copyfile(src, dst)
+
+
 def _calculate_file_hash(file_path: str) -> str:
     """Calculate SHA-256 hash of file."""
-    sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: the read/update loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        sha256_hash = hashlib.sha256()
+        buffer = bytearray(1 << 20)
+        view = memoryview(buffer)
+        while n := f.readinto(buffer):
+            sha256_hash.update(view[:n])
+        return sha256_hash.hexdigest()
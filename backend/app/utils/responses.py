@@ -0,0 +1,10 @@
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (native datetime/UUID support)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)